@@ -9,12 +9,17 @@ from curl_cffi import requests  # pip3 install curl_cffi
 
 from utils.symbols import *
 from utils.corepath import *
+from data.priceStore import append_prices, read_prices, has_ticker
+from data.priceManifest import record_write, load_manifest, last_date, plan_updates
+from data.panelCache import build_universe_cache
 
 
 # -------------------- CONFIG -------------------- 
 SAVE_DIR    = "Data/yahoo"                        # folder under cwd
 START_DATE  = "2020-01-01"                        # first-time full download start
 AUTO_ADJUST = False                               # True -> adjusted OHLCV
+BATCH_SIZE  = 50                                  # max symbols per multi-ticker request
+STORE_BACKEND = "parquet"                         # "parquet" -> append-only data.priceStore; "csv" -> legacy CSV+PKL rewrite
 # ------------------------------------------------
 
 def get_data_yfinance(tickerList, start_date, end_date):
@@ -54,6 +59,46 @@ def _read_existing(csv_path):
         print(f"[WARN] Failed to read existing CSV {csv_path}: {e}")
         return None
 
+def _store_dir(base_dir):
+    return os.path.join(base_dir, "store")
+
+def _read_master(ticker, base_dir):
+    """
+    Read a ticker's master history from the active backend.
+    Falls back to the legacy CSV for tickers not yet in the parquet store.
+    """
+    if STORE_BACKEND == "parquet" and has_ticker(ticker, _store_dir(base_dir)):
+        return read_prices(ticker, store_dir=_store_dir(base_dir))
+    csv_path, _ = _paths(ticker, base_dir)
+    return _read_existing(csv_path)
+
+def _manifest_dir(base_dir):
+    return _store_dir(base_dir) if STORE_BACKEND == "parquet" else base_dir
+
+def _master_last_date(ticker, base_dir, manifest=None):
+    """
+    Last saved date for `ticker` from the manifest (no price file is opened).
+    Tickers without an entry are read once and back-filled into the manifest.
+    Returns None if the ticker has no history yet.
+    """
+    last_dt = last_date(ticker, _manifest_dir(base_dir), manifest)
+    if last_dt is not None:
+        return last_dt
+    existing = _read_master(ticker, base_dir)
+    if existing is None or existing.empty:
+        return None
+    record_write(ticker, existing, _manifest_dir(base_dir), source="backfill", replace=True)
+    return existing.index.max().date()
+
+def _existing_for_append(ticker, base_dir):
+    """
+    Master history that _append_and_save needs: nothing for a ticker already in the
+    parquet store (rows are only appended), the full history otherwise.
+    """
+    if STORE_BACKEND == "parquet" and has_ticker(ticker, _store_dir(base_dir)):
+        return None
+    return _read_master(ticker, base_dir)
+
 def _download_history_archive(ticker, start, end):
     """
     Download daily OHLCV data using yfinance directly (no curl_cffi).
@@ -86,6 +131,49 @@ def _download_history_archive(ticker, start, end):
     return df
 
 
+def _download_batch(tickers, start, end=None):
+    """
+    Download daily OHLCV for several tickers in one yfinance request.
+    Returns {ticker: DataFrame} with the same tidy layout as _download_history
+    (Date index, flat OHLCV columns). Tickers with no rows are left out.
+    """
+    tickers = list(tickers)
+    df = yf.download(
+        tickers=tickers,
+        start=start,
+        end=end,               # None -> latest available
+        interval="1d",
+        auto_adjust=AUTO_ADJUST,
+        progress=False,
+        group_by="ticker",
+        threads=True,
+    )
+
+    if df is None or df.empty:
+        return {}
+
+    if getattr(df.index, "tz", None) is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+
+    # Split the wide (ticker, field) frame back into one frame per ticker
+    frames = {}
+    for t in tickers:
+        if isinstance(df.columns, pd.MultiIndex):
+            if t not in df.columns.get_level_values(0):
+                continue
+            sub = df[t]
+        else:
+            sub = df
+        sub = sub.dropna(how="all")
+        if sub.empty:
+            continue
+        sub = sub.copy()
+        sub.columns.name = None
+        frames[t] = sub
+    return frames
+
+
 def _download_history(ticker, start=None, end=None, save=True, save_dir=None):
     """
     Used in Google Colab
@@ -162,7 +250,16 @@ def _download_history(ticker, start=None, end=None, save=True, save_dir=None):
     return df
 
 
-def _append_and_save(ticker, existing, new_df, base_dir):
+def _append_and_save(ticker, existing, new_df, base_dir, source="yfinance"):
+    if STORE_BACKEND == "parquet":
+        store_dir = _store_dir(base_dir)
+        # First write of a ticker that so far only lives in CSV: seed the store with its history
+        if existing is not None and not existing.empty and not has_ticker(ticker, store_dir):
+            append_prices(ticker, existing, store_dir, source="csv-migration")
+        rows = append_prices(ticker, new_df, store_dir, source=source)
+        print(f"[OK] Appended {ticker}: {store_dir} | new rows={rows}")
+        return
+
     if existing is None:
         combined = new_df.copy()
     else:
@@ -173,6 +270,7 @@ def _append_and_save(ticker, existing, new_df, base_dir):
     csv_path, pkl_path = _paths(ticker, base_dir)
     combined.to_csv(csv_path, index=True)
     combined.to_pickle(pkl_path)
+    record_write(ticker, combined, base_dir, source, replace=True)
     print(f"[OK] Saved {ticker}: {csv_path} and {pkl_path} | rows={len(combined)}")
 
 
@@ -209,11 +307,10 @@ def _save_incremental_data_old(ticker, base_dir=data_path, daily_dir=data_path,
         return
 
     # Load existing master
-    csv_path, pkl_path = _paths(ticker, base_dir)
-    existing = _read_existing(csv_path)
+    existing = _existing_for_append(ticker, base_dir)
 
     # Append + de-dup + save
-    _append_and_save(ticker, existing, new_df, base_dir)
+    _append_and_save(ticker, existing, new_df, base_dir, source="temp-file")
 
     # Cleanup temp files
     try:
@@ -261,15 +358,22 @@ def _save_incremental_data(ticker, base_dir=data_path, daily_dir=data_path, date
         print(f"[ERR] Reading temp CSV {target_csv}: {e}")
         return False
 
-    # Load existing master
-    csv_path, pkl_path = _paths(ticker, base_dir)
-    existing = _read_existing(csv_path)
-
     # Determine the temp row's date
     temp_dt = new_df.index.max().date()
 
-    # If master already has this date, just clean up temp and exit
-    if existing is not None and not existing.empty and temp_dt in existing.index.date:
+    # If master already has this date, just clean up temp and exit.
+    # The manifest answers the common case (temp_dt at or after the last saved date);
+    # only an older temp file needs the master itself.
+    last_dt = _master_last_date(ticker, base_dir)
+    if last_dt is None or temp_dt > last_dt:
+        has_date = False
+    elif temp_dt == last_dt:
+        has_date = True
+    else:
+        master = _read_master(ticker, base_dir)
+        has_date = master is not None and temp_dt in master.index.date
+
+    if has_date:
         print(f"[SKIP] {ticker}: master already has {temp_dt}. Cleaning up temp.")
         try:
             os.remove(target_csv)
@@ -280,7 +384,8 @@ def _save_incremental_data(ticker, base_dir=data_path, daily_dir=data_path, date
         return False
 
     # Append + de-dup + save
-    _append_and_save(ticker, existing, new_df, base_dir)
+    existing = _existing_for_append(ticker, base_dir)
+    _append_and_save(ticker, existing, new_df, base_dir, source="temp-file")
 
     # Cleanup temp files
     try:
@@ -343,18 +448,16 @@ def update_or_init_ticker(ticker, base_dir, start_date, daily_dir=data_path, dat
         2) If daily file not there and master already has the latest date -> do nothing (your Case 2).
         3) (Optional fallback) If daily file not there and master is behind -> fetch via _download_history and append.
     """
-    csv_path, _ = _paths(ticker, base_dir)
-    existing = _read_existing(csv_path)
+    last_dt = _master_last_date(ticker, base_dir)
 
     # ----- First-time init -----
-    if existing is None or existing.empty:
+    if last_dt is None:
         print(f"[INIT] {ticker}: downloading from {start_date}…")
         df_full = _download_history(ticker, start=start_date, end=None, save=False)
         if df_full is None or df_full.empty:
             print(f"[SKIP] {ticker}: no data returned.")
             return
         _append_and_save(ticker, None, df_full, base_dir)
-        existing = _read_existing(csv_path)  # refresh
         return
 
     # ----- Incremental path -----
@@ -369,9 +472,8 @@ def update_or_init_ticker(ticker, base_dir, start_date, daily_dir=data_path, dat
         date_obj=today_dt
     )
 
-    # Reload after potential append
-    existing = _read_existing(csv_path) 
-    last_dt = existing.index.max().date()
+    # Last saved date after potential append (manifest lookup, no reload)
+    last_dt = _master_last_date(ticker, base_dir)
 
     # 2) If no temp file appended and existing already has today's date -> do nothing (Case 2)
     if not appended and last_dt == today_dt:
@@ -388,19 +490,82 @@ def update_or_init_ticker(ticker, base_dir, start_date, daily_dir=data_path, dat
             if df_new is None or df_new.empty:
                 print(f"[NO-NEW] {ticker}: nothing beyond {last_dt}.")
                 return
-            _append_and_save(ticker, existing, df_new, base_dir)
+            _append_and_save(ticker, _existing_for_append(ticker, base_dir), df_new, base_dir)
 
-def main():
-    base_dir = data_path
+def update_universe_batched(tickers, base_dir, start_date, daily_dir=data_path, date_obj=None,
+                            batch_size=BATCH_SIZE):
+    """
+    Batched version of update_or_init_ticker for a whole ticker list.
 
-    for ticker in TICKERS:
+    - Applies any <ticker><YYYYMMDD>.csv temp file first (same as Case 1).
+    - Groups the remaining tickers by the date they must be fetched from
+      (`start_date` for first-time init, last saved date for incremental),
+      using the price manifest instead of opening every price file.
+    - Issues one multi-symbol request per group (chunked by `batch_size`)
+      and splits the result back into per-ticker frames for _append_and_save.
+
+    Network cost grows with the number of distinct gaps, not the number of tickers.
+    """
+    today_dt = (date_obj or date.today())
+    tickers = list(dict.fromkeys(tickers))   # de-dup, keep order
+
+    manifest = load_manifest(_manifest_dir(base_dir))
+    for ticker in tickers:
         try:
-            # update_or_init_ticker(ticker, base_dir, START_DATE)
-            update_or_init_ticker(ticker, base_dir, START_DATE, data_path, date_obj=None)
-            # update_or_init_ticker(ticker, base_dir, START_DATE, data_path, date_obj=date(2025, 9, 5))
+            _save_incremental_data(ticker=ticker, base_dir=base_dir,
+                                   daily_dir=daily_dir, date_obj=today_dt)
+            if ticker not in manifest:
+                _master_last_date(ticker, base_dir)   # one-time back-fill for legacy files
         except Exception as e:
             print(f"[ERR] {ticker}: {e}", file=sys.stderr)
-        time.sleep(1)
+
+    # One manifest lookup decides the whole universe; overlap 1 day on incremental
+    # fetches, de-dup on read / in _append_and_save keeps the latest bar
+    groups, up_to_date = plan_updates(tickers, _manifest_dir(base_dir), start_date, today_dt)
+    for ticker in up_to_date:
+        print(f"[UP-TO-DATE] {ticker}: master already has {today_dt}.")
+
+    for fetch_from, group in sorted(groups.items()):
+        for i in range(0, len(group), batch_size):
+            chunk = group[i:i + batch_size]
+            print(f"[BATCH] {len(chunk)} tickers: fetching {fetch_from} → latest…")
+            try:
+                frames = _download_batch(chunk, start=fetch_from, end=None)
+            except Exception as e:
+                print(f"[ERR] batch from {fetch_from}: {e}", file=sys.stderr)
+                continue
+
+            for ticker in chunk:
+                new_df = frames.get(ticker)
+                if new_df is None or new_df.empty:
+                    print(f"[NO-NEW] {ticker}: nothing returned from {fetch_from}.")
+                    continue
+                try:
+                    _append_and_save(ticker, _existing_for_append(ticker, base_dir), new_df, base_dir)
+                except Exception as e:
+                    print(f"[ERR] {ticker}: {e}", file=sys.stderr)
+            time.sleep(1)
+
+def main(batched=True):
+    base_dir = data_path
+
+    if batched:
+        update_universe_batched(TICKERS, base_dir, START_DATE, data_path, date_obj=None)
+    else:
+        for ticker in TICKERS:
+            try:
+                # update_or_init_ticker(ticker, base_dir, START_DATE)
+                update_or_init_ticker(ticker, base_dir, START_DATE, data_path, date_obj=None)
+                # update_or_init_ticker(ticker, base_dir, START_DATE, data_path, date_obj=date(2025, 9, 5))
+            except Exception as e:
+                print(f"[ERR] {ticker}: {e}", file=sys.stderr)
+            time.sleep(1)
+
+    # Refresh the memory-mapped panel so the signal scripts start without parsing
+    try:
+        build_universe_cache(TICKERS)
+    except Exception as e:
+        print(f"[ERR] panel cache: {e}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
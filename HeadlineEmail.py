@@ -29,7 +29,7 @@ def main(runDate):
     logging.info(f"Running job for {runDate}")
     
     runDateStr = runDate.strftime('%Y-%m-%d')
-    finnhub_client = finnhub.Client(api_key=API_KEY)
+    finnhub_client = get_finnhub_client()   # shared, rate-limited finnhub.Client
 
     NEWS_COUNT = 10
 
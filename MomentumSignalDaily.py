@@ -14,10 +14,13 @@ from utils.email_utils import *
 from utils.corepath import *
 from utils.formats import *
 from data.dataLoader import *
+from data.panelCache import load_panel_cached
 from signals.KlineSignal import *
 from signals.RsiSignal import *
 from signals.VolumeSignal import *
 from signals.MomentumSignal import *
+from signals.PanelSignal import panel_signals
+from signals.IndicatorState import update_ticker_state
 
 
 
@@ -33,7 +36,11 @@ def main():
     signal_cols = ['BB_Buy_Signal','BB_Sell_Signal','Signal','Solid_Buy','Solid_Sell','Overbought','Oversold','Divergence']
     email_result = ""
 
-    df_data = load_all_data()
+    panel = load_panel_cached(TICKERS)   # memory-mapped, no CSV parsing
+    df_data = panel.to_frames()
+    # KD -> dropna -> Bollinger -> RSI -> momentum for every ticker in one pass,
+    # only computed if a ticker's saved indicator state can't be used
+    signal_panel = None
     email_rows = []
 
     VOL_WIN = 20  # lookback window for volume stats
@@ -107,16 +114,15 @@ def main():
         adl = (mfm * data['Volume']).cumsum()
         adl_slope = adl.iloc[-1] - adl.iloc[max(len(adl)-CONF_WIN-1, 0)]
 
-        # --- Indicator Calculations ---
-        kd_data = calcKD(data)
-        kd_data = kd_data.dropna()
-        # Detect momentum based on %K and %D crossovers
-        bb_data = bollinger_bands(kd_data)
-        rsi_data = calcRSI(bb_data, period=14, price_col="Close", out_col="RSI")
-        momentum_data = momentum_signals(rsi_data)
-        
-
-        if (len(momentum_data)==0):
+        # --- Indicator Calculations (saved per-ticker state, only new bars are processed) ---
+        try:
+            last, _ = update_ticker_state(ticker, data[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']])
+        except Exception as e:
+            print(f"[WARN] {ticker}: indicator state failed ({e}), using panel_signals")
+            if signal_panel is None:
+                signal_panel = panel_signals(panel)
+            last = signal_panel.last_row(ticker)
+        if last is None:
             continue
         
         # --- Labels shown in "Signals" column (kept for texture) ---
@@ -132,7 +138,6 @@ def main():
         volume_signal = genVolumeSignal(daily_change, obv_slope, adl_slope, vol_ratio_5, vol_z, ZSURGE, SURGE_X, DRYUP_X)
 
         result_parts = []
-        last = momentum_data.iloc[-1]
         momentum_signal = last.get("Composite_Signal", np.nan)
         momentum_score  = last.get("Composite_Score", np.nan)
 
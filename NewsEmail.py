@@ -19,38 +19,59 @@ import io
 import plotly.express as px
 import finnhub
 
-def main(runDate):
+def main(runDate, sentiment_mode="remote"):
+    # sentiment_mode: 'remote' (chat model, lexicon fallback on errors), opt-in
+    # 'hybrid' (local lexicon, ambiguous articles to the chat model) or 'lexicon' (no network)
     
     runDateStr = runDate.strftime('%Y-%m-%d')
-    finnhub_client = finnhub.Client(api_key=API_KEY)
+    finnhub_client = get_finnhub_client()   # shared, rate-limited finnhub.Client
     
     # Constructing the Email Body
     email_subject = "Daily Stock News Updates" + runDateStr
 
     email_body = ""
 
-    for ticker in TICKERS:
+    # Fetch every ticker's news first (concurrently, under the Finnhub rate limit),
+    # then score all articles in one batch
+    def fetch(ticker):
         print(ticker)
-        import time
-        newsDict = finnhub_client.company_news(ticker, _from=runDateStr, to=runDateStr)
-        if not newsDict:  # Skip if empty list
-            continue
+        return ticker, finnhub_client.company_news(ticker, _from=runDateStr, to=runDateStr)
 
+    ticker_news = [(ticker, newsDict[:5])  # Up to 5 articles per ticker
+                   for ticker, newsDict in finnhub_client.map(fetch, TICKERS)
+                   if newsDict]  # Skip if empty list
+
+    # Each story once, however many tickers it was returned for
+    stories, ticker_stories = dedup_news(ticker_news)
+    texts = [story['item']['headline'] + story['item']['summary'] for story in stories]
+    sentiments = scoreSentiments(texts, mode=sentiment_mode)
+
+    shown = {}
+    for ticker, story_ids in ticker_stories:
         email_body += f"<h3> News for {ticker}:</h3><ul>"
-        for news in newsDict[:5]:  # Up to 3 articles per ticker
-            sentiment = "Sentiment: " + getSentiment(news['headline']+news['summary'])
+        for s in story_ids:
+            news = stories[s]['item']
+            if s in shown:
+                email_body += f"""
+            <li>
+                <b>{news['headline']}</b> (see {shown[s]} above)
+            </li><br>
+            """
+                continue
+            shown[s] = ticker
+            sentiment = "Sentiment: " + sentiments[s]
+            related = [t for t in stories[s]['tickers'] if t != ticker]
+            also = f"<br>Also for: {', '.join(related)}<br>" if related else ""
             email_body += f"""
             <li>
                 <b>{news['headline']}</b>
                 <br>{news['summary']}<br>
-                <br>{sentiment}<br>
+                <br>{sentiment}<br>{also}
                 <a href="{news['url']}">Read more</a>
             </li><br>
             """
         email_body += "</ul>"
 
-        time.sleep(2)
-
     # Only send email if there is at least one news item
     if email_body:
         send_email(email_subject, email_body)
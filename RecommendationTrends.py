@@ -8,8 +8,9 @@ from utils.symbols import *
 from utils.credential import *
 from utils.corepath import *
 from utils.email_utils import *
+from utils.FinnhubClient import get_finnhub_client
 
-finnhub_client = finnhub.Client(api_key=API_KEY)
+finnhub_client = get_finnhub_client()   # shared, rate-limited finnhub.Client
 
 def get_latest_recommendation(ticker):
     """
@@ -73,9 +74,9 @@ def main(runDate):
     runDateStr = runDate.strftime('%Y%m%d')
 
     results = []
-    for ticker in TICKERS:
-        import time
-        rec = get_latest_recommendation(ticker)
+    # fetched concurrently; the shared client waits only when the rate limit is reached
+    recs = finnhub_client.map(get_latest_recommendation, TICKERS)
+    for ticker, rec in zip(TICKERS, recs):
         if rec:
             print(f"{ticker} ({rec['period']}): "
                   f"Strong Buy={rec['strongBuy']}, Buy={rec['buy']}, "
@@ -83,7 +84,6 @@ def main(runDate):
             results.append({"Ticker": ticker, **rec})
         else:
             print(f"{ticker}: No recommendation data found.")
-        time.sleep(5)
    
     if results:
         pd.DataFrame(results).to_csv(f"{stock_recommandation_path}StockRec{runDateStr}.csv", index=False)
@@ -1,8 +1,9 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from backtest.VectorBacktest import backtest_vectorized
 
-def backtest(data, initial_cash=10000):
+def backtest_iterrows(data, initial_cash=10000):
 
 
     """
@@ -46,4 +47,16 @@ def backtest(data, initial_cash=10000):
     # Calculate final return percentage
     final_return_percentage = ((portfolio_value - initial_cash) / initial_cash) * 100
 
-    return trade_df, portfolio_value, max_drawdown, final_return_percentage
\ No newline at end of file
+    return trade_df, portfolio_value, max_drawdown, final_return_percentage
+
+
+def backtest(data, initial_cash=10000):
+    """
+    Backtest strategy based on buy/sell signals (vectorized; same results as
+    backtest_iterrows).
+
+    :param data: DataFrame containing the signals and OHLC data
+    :param initial_cash: The initial cash amount for the portfolio
+    :return: trade_df, portfolio_value, max_drawdown, final_return_percentage
+    """
+    return backtest_vectorized(data, initial_cash)
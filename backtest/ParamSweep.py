@@ -0,0 +1,245 @@
+import os
+import random
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from signals.PanelSignal import (PanelStage, SignalPanel, DEFAULT_WEIGHTS, panel_base, panel_kd,
+                                 panel_bollinger, panel_rsi, panel_momentum)
+from backtest.PortfolioBacktest import portfolio_backtest
+
+# Grid / random search over the daily signal pipeline's knobs, scored with
+# portfolio_backtest, optionally over walk-forward train/test windows.
+#
+# Combinations are grouped by their indicator parameters (KD, Bollinger, RSI).
+# One group is one process-pool task: the indicators are computed once for the
+# group and only momentum_signals' thresholds/weights vary inside it. Each
+# worker also keeps the KD stage per KD setting, so groups that differ only in
+# Bollinger/RSI windows share it.
+
+KD_KEYS = ("kd_window", "k_period", "d_period")
+BB_KEYS = ("bb_window", "no_of_std")
+RSI_KEYS = ("rsi_period",)
+INDICATOR_KEYS = KD_KEYS + BB_KEYS + RSI_KEYS
+MOMENTUM_KEYS = ("rsi_overbought", "rsi_oversold", "rsi_midline", "buy_threshold", "sell_threshold")
+WEIGHT_KEYS = tuple(f"w_{k}" for k in DEFAULT_WEIGHTS)   # w_kd, w_kd_solid, w_rsi, ...
+
+DEFAULT_PARAMS = {
+    "kd_window": 3, "k_period": 3, "d_period": 3,
+    "bb_window": 20, "no_of_std": 2,
+    "rsi_period": 14,
+    "rsi_overbought": 70, "rsi_oversold": 30, "rsi_midline": 50,
+    "buy_threshold": 2.0, "sell_threshold": -2.0,
+    **{f"w_{k}": v for k, v in DEFAULT_WEIGHTS.items()},
+}
+
+METRICS = ("return_pct", "sharpe", "calmar", "max_drawdown")
+LOWER_IS_BETTER = ("max_drawdown",)
+
+
+def grid(space):
+    """Every combination of `space` ({param: [values]}), as full parameter dicts."""
+    keys = list(space)
+    return [dict(DEFAULT_PARAMS, **dict(zip(keys, values)))
+            for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_search(space, n, seed=None):
+    """`n` distinct random combinations from `space` (fewer if the grid is smaller)."""
+    rng = random.Random(seed)
+    keys = list(space)
+    total = int(np.prod([len(space[k]) for k in keys]))
+    picks = set()
+    while len(picks) < min(n, total):
+        picks.add(tuple(rng.randrange(len(space[k])) for k in keys))
+    return [dict(DEFAULT_PARAMS, **{k: space[k][i] for k, i in zip(keys, pick)})
+            for pick in sorted(picks)]
+
+
+def walk_forward_splits(n_dates, train, test, step=None, anchored=False):
+    """
+    [(train_slice, test_slice)] over a date axis of length `n_dates`.
+    Windows roll forward by `step` (default `test`); anchored=True keeps the
+    training window starting at 0.
+    """
+    step = test if step is None else step
+    splits = []
+    start = 0
+    while start + train + test <= n_dates:
+        train_lo = 0 if anchored else start
+        splits.append((slice(train_lo, start + train), slice(start + train, start + train + test)))
+        start += step
+    return splits
+
+
+def _sort_ascending(metric):
+    """Whether results are ranked ascending by `metric`; raises ValueError for an unknown one."""
+    if metric not in METRICS:
+        raise ValueError(f"unknown metric {metric!r}, expected one of {METRICS}")
+    return metric in LOWER_IS_BETTER
+
+
+def _metrics(report):
+    ret = report.returns.to_numpy()[1:]
+    sd = ret.std()
+    sharpe = float(ret.mean() / sd * np.sqrt(252)) if sd > 0 else 0.
+    calmar = float(report.return_pct / 100 / report.max_drawdown) if report.max_drawdown > 0 else 0.
+    return {"return_pct": report.return_pct, "max_drawdown": report.max_drawdown,
+            "sharpe": sharpe, "calmar": calmar, "trades": report.trades,
+            "exposure": float(report.exposure.mean())}
+
+
+# ---- worker side ----
+
+_worker_panel = None
+_kd_cache = {}
+
+
+def _init_worker(panel):
+    global _worker_panel
+    _worker_panel = panel
+    _kd_cache.clear()
+
+
+def _kd_stage(panel, kd):
+    if kd not in _kd_cache:
+        _kd_cache[kd] = panel_kd(panel_base(panel), *kd)
+    return _kd_cache[kd]
+
+
+def _run_group(indicator, combos, windows, backtest_kwargs, panel=None):
+    """Evaluate every momentum combo of one indicator setting on every window."""
+    panel = _worker_panel if panel is None else panel
+    p = dict(zip(INDICATOR_KEYS, indicator))
+    stage = _kd_stage(panel, tuple(p[k] for k in KD_KEYS))
+    cols = dict(stage.cols)
+    cols.update(panel_bollinger(stage, p["bb_window"], p["no_of_std"]))
+    cols["RSI"] = panel_rsi(stage, p["rsi_period"])
+
+    prices = panel.frame("Open")
+    rows = []
+    for params in combos:
+        weights = {k: params[f"w_{k}"] for k in DEFAULT_WEIGHTS}
+        out = panel_momentum(cols, weights, *(params[k] for k in MOMENTUM_KEYS))
+        sig = SignalPanel(panel.dates, panel.tickers, PanelStage(out, stage.src, stage.valid))
+        # Composite_Signal as +1/-1/0 straight from the score (skips the string frame)
+        scores = sig.frame("Composite_Score")
+        signals = (scores >= params["buy_threshold"]).astype(int) \
+                - (scores <= params["sell_threshold"]).astype(int)
+        for name, win in windows.items():
+            rep = portfolio_backtest(prices.iloc[win], signals.iloc[win],
+                                     scores=scores.iloc[win], **backtest_kwargs)
+            rows.append({**params, "window": name, **_metrics(rep)})
+    return rows
+
+
+# ---- driver ----
+
+def _group(combos):
+    groups = {}
+    for params in combos:
+        groups.setdefault(tuple(params[k] for k in INDICATOR_KEYS), []).append(params)
+    return groups
+
+
+def evaluate(panel, combos, windows=None, max_workers=None, **backtest_kwargs):
+    """
+    Backtest every parameter dict in `combos` on `panel`.
+
+    :param windows: {name: slice over panel.dates}; default the whole panel ("all").
+                    Indicators always see the full history, so a window only limits
+                    the backtest (which starts in cash at the window's first bar).
+    :param max_workers: process count; 1 runs in this process
+    :param backtest_kwargs: passed to portfolio_backtest (sizing, cost_bps, ...)
+    :return: DataFrame, one row per (combo, window) with parameters and metrics
+    """
+    windows = {"all": slice(None)} if windows is None else windows
+    groups = _group(combos)
+    max_workers = max_workers or min(len(groups), os.cpu_count() or 1)
+
+    rows = []
+    if max_workers <= 1 or len(groups) == 1:
+        _kd_cache.clear()
+        for indicator, group in groups.items():
+            rows += _run_group(indicator, group, windows, backtest_kwargs, panel)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(panel,)) as ex:
+            futures = [ex.submit(_run_group, indicator, group, windows, backtest_kwargs)
+                       for indicator, group in groups.items()]
+            for f in futures:
+                rows += f.result()
+    print(f"[SWEEP] {len(combos)} combos x {len(windows)} windows "
+          f"({len(groups)} indicator groups, {max_workers} workers)")
+    return pd.DataFrame(rows)
+
+
+def sweep(panel, space, n_random=None, seed=None, metric="return_pct", max_workers=None,
+          **backtest_kwargs):
+    """
+    Grid search over `space` ({param: [values]}; see DEFAULT_PARAMS for names),
+    or `n_random` random combinations of it. Returns results sorted best first
+    by `metric` (one of METRICS; smallest first for max_drawdown).
+    """
+    ascending = _sort_ascending(metric)
+    combos = grid(space) if n_random is None else random_search(space, n_random, seed)
+    res = evaluate(panel, combos, max_workers=max_workers, **backtest_kwargs)
+    return res.sort_values(metric, ascending=ascending, ignore_index=True)
+
+
+def walk_forward(panel, space, train=504, test=126, step=None, anchored=False, n_random=None,
+                 seed=None, metric="return_pct", max_workers=None, **backtest_kwargs):
+    """
+    Walk-forward optimization: on each split pick the best combination by
+    `metric` on the train window and report how it did on the following test window.
+
+    :return: (summary DataFrame, one row per split with the chosen params and
+              train/test metrics; full results DataFrame)
+    """
+    ascending = _sort_ascending(metric)
+    splits = walk_forward_splits(len(panel.dates), train, test, step, anchored)
+    if not splits:
+        raise ValueError(f"{len(panel.dates)} dates is too short for train={train}, test={test}")
+    windows = {}
+    for i, (tr, te) in enumerate(splits):
+        windows[f"train{i}"], windows[f"test{i}"] = tr, te
+
+    combos = grid(space) if n_random is None else random_search(space, n_random, seed)
+    res = evaluate(panel, combos, windows, max_workers, **backtest_kwargs)
+    keys = list(DEFAULT_PARAMS)
+
+    summary = []
+    for i, (tr, te) in enumerate(splits):
+        best = res[res["window"] == f"train{i}"].sort_values(metric, ascending=ascending).iloc[0]
+        chosen = best[keys].to_dict()
+        test_row = res[(res["window"] == f"test{i}") &
+                       (res[keys] == pd.Series(chosen)).all(axis=1)].iloc[0]
+        summary.append({
+            "split": i,
+            "train_start": panel.dates[tr][0].date(), "test_start": panel.dates[te][0].date(),
+            "test_end": panel.dates[te][-1].date(),
+            **{k: v for k, v in chosen.items() if k in space},
+            f"train_{metric}": best[metric], f"test_{metric}": test_row[metric],
+            "test_return_pct": test_row["return_pct"], "test_max_drawdown": test_row["max_drawdown"],
+        })
+    summary = pd.DataFrame(summary)
+    oos = (np.prod(1 + summary["test_return_pct"] / 100) - 1) * 100
+    print(f"[WALK-FORWARD] {len(splits)} splits, compounded out-of-sample return {oos:.2f}%")
+    return summary, res
+
+
+if __name__ == "__main__":
+    from utils.symbols import *
+    from data.panelCache import load_panel_cached
+
+    panel = load_panel_cached(TICKERS)
+    space = {
+        "rsi_period": [10, 14],
+        "bb_window": [20],
+        "rsi_oversold": [25, 30],
+        "rsi_overbought": [70, 75],
+        "buy_threshold": [1.0, 1.5, 2.0],
+        "sell_threshold": [-1.0, -2.0],
+    }
+    print(sweep(panel, space).head(10).to_string())
@@ -0,0 +1,144 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Whole-universe backtest on aligned dates x tickers arrays.
+#
+#   signals  --ffill-->  held (0/1)  --sizing-->  target weights  --shift(1)-->  weights
+#   weights * price returns  -->  portfolio returns  -->  equity / exposure / drawdown
+#
+# A signal seen on bar t is acted on from bar t+1, positions are rebalanced to
+# their target weights every bar, and transaction costs are charged on turnover.
+
+SIZING_RULES = ("equal", "fixed", "score")
+
+PortfolioReport = namedtuple(
+    "PortfolioReport",
+    ["equity", "returns", "weights", "exposure", "drawdown", "turnover",
+     "max_drawdown", "final_value", "return_pct", "trades"])
+
+
+def signal_matrix(signals, buy="Buy", sell="Sell"):
+    """
+    dates x tickers frame of +1 (buy) / -1 (sell) / 0 from a frame of string
+    signals (e.g. SignalPanel.frame('Composite_Signal')) or of numbers.
+    """
+    if all(dt.kind in "fiub" for dt in signals.dtypes):
+        return np.sign(signals.fillna(0))
+    values = signals.to_numpy()
+    out = np.where(values == buy, 1, np.where(values == sell, -1, 0))
+    return pd.DataFrame(out, index=signals.index, columns=signals.columns)
+
+
+def holdings(signals):
+    """0/1 holdings: long from a buy until the next sell (signals as +1/-1/0)."""
+    state = signals.replace(0, np.nan).ffill().fillna(-1)
+    return (state > 0).astype("float64")
+
+
+def target_weights(held, sizing="equal", scores=None, fraction=0.1, max_weight=1.0):
+    """
+    Target weight per ticker and date from 0/1 holdings.
+
+    - equal: split the portfolio evenly across everything held.
+    - fixed: `fraction` of equity per position, scaled down when they add up to more than 100%.
+    - score: proportional to `scores` (dates x tickers, negatives count as 0) across held names.
+    Every weight is capped at `max_weight`; the remainder stays in cash.
+    """
+    h = held.to_numpy()
+    if sizing == "equal":
+        n = h.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(n > 0, h / n, 0.)
+    elif sizing == "fixed":
+        w = h * fraction
+        total = w.sum(axis=1, keepdims=True)
+        w = np.where(total > 1, w / np.where(total > 0, total, 1), w)
+    elif sizing == "score":
+        if scores is None:
+            raise ValueError("sizing='score' needs a scores frame")
+        s = np.clip(scores.reindex_like(held).to_numpy(dtype="float64"), 0, None)
+        s = np.nan_to_num(s) * h
+        total = s.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(total > 0, s / total, 0.)
+    else:
+        raise ValueError(f"unknown sizing {sizing!r}, expected one of {SIZING_RULES}")
+    w = np.minimum(w, max_weight)
+    return pd.DataFrame(w, index=held.index, columns=held.columns)
+
+
+def portfolio_backtest(prices, signals, initial_cash=10000, sizing="equal", scores=None,
+                       fraction=0.1, max_weight=1.0, cost_bps=0.0):
+    """
+    Backtest a dates x tickers signal matrix against dates x tickers prices.
+
+    :param prices: DataFrame of trade prices (e.g. PricePanel.frame('Open')); NaN = no bar
+    :param signals: DataFrame aligned with `prices`, strings ('Buy'/'Sell') or +1/-1/0
+    :param sizing: 'equal', 'fixed' or 'score' (see target_weights)
+    :param scores: DataFrame used by sizing='score' (e.g. SignalPanel.frame('Composite_Score'));
+                   the score on the buy bar is kept for as long as the position is held
+    :param cost_bps: cost per unit of turnover, in basis points
+    :return: PortfolioReport
+    """
+    signals = signal_matrix(signals.reindex_like(prices))
+    tradable = prices.notna()
+
+    held = holdings(signals) * tradable
+    if scores is not None:
+        scores = scores.reindex_like(prices).where(signals > 0).ffill()
+    weights = target_weights(held, sizing, scores, fraction, max_weight)
+    weights = weights.shift(1).fillna(0.)   # act on the bar after the signal
+    weights = weights.where(tradable, 0.)   # nothing held through a missing bar
+
+    px = prices.to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asset_ret = px[1:] / px[:-1] - 1
+    asset_ret = np.vstack([np.zeros((1, px.shape[1])), np.nan_to_num(asset_ret, nan=0., posinf=0., neginf=0.)])
+
+    w = weights.to_numpy()
+    w_prev = np.vstack([np.zeros((1, w.shape[1])), w[:-1]])
+    turnover = np.abs(w - w_prev).sum(axis=1)
+    port_ret = (w_prev * asset_ret).sum(axis=1) - turnover * cost_bps / 1e4
+
+    equity = initial_cash * np.cumprod(1 + port_ret)
+    peak = np.maximum.accumulate(np.concatenate(([initial_cash], equity)))[1:]
+    drawdown = (peak - equity) / peak
+    final_value = equity[-1] if len(equity) else initial_cash
+
+    idx = prices.index
+    return PortfolioReport(
+        equity=pd.Series(equity, index=idx, name="Equity"),
+        returns=pd.Series(port_ret, index=idx, name="Return"),
+        weights=weights,
+        exposure=pd.Series(w.sum(axis=1), index=idx, name="Exposure"),
+        drawdown=pd.Series(drawdown, index=idx, name="Drawdown"),
+        turnover=pd.Series(turnover, index=idx, name="Turnover"),
+        max_drawdown=float(drawdown.max()) if len(drawdown) else 0.,
+        final_value=final_value,
+        return_pct=((final_value - initial_cash) / initial_cash) * 100,
+        trades=int(np.abs(np.diff((w > 0).astype(int), axis=0, prepend=0)).sum()),
+    )
+
+
+def summarize(report):
+    """One-line summary of a PortfolioReport."""
+    return (f"final {report.final_value:,.2f} ({report.return_pct:.2f}%), "
+            f"max DD {report.max_drawdown:.2%}, avg exposure {report.exposure.mean():.2f}, "
+            f"{report.trades} position changes")
+
+
+if __name__ == "__main__":
+    import time
+    from utils.symbols import *
+    from data.panelCache import load_panel_cached
+    from signals.PanelSignal import panel_signals
+
+    panel = load_panel_cached(TICKERS)
+    sig = panel_signals(panel)
+    for rule in SIZING_RULES:
+        t0 = time.perf_counter()
+        rep = portfolio_backtest(panel.frame("Open"), sig.frame("Composite_Signal"), sizing=rule,
+                                 scores=sig.frame("Composite_Score"))
+        print(f"[{rule}] {summarize(rep)} ({time.perf_counter() - t0:.3f}s)")
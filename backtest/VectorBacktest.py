@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+
+def signal_arrays(data):
+    """
+    Boolean buy/sell arrays from the string signal columns backtest() reads:
+    buy where Signal == 'Buy' or Solid_Buy == 'Solid Buy', sell likewise.
+    """
+    buy = (data['Signal'].to_numpy() == 'Buy') | (data['Solid_Buy'].to_numpy() == 'Solid Buy')
+    sell = (data['Signal'].to_numpy() == 'Sell') | (data['Solid_Sell'].to_numpy() == 'Solid Sell')
+    return buy, sell
+
+
+def backtest_vectorized(data, initial_cash=10000, return_equity=False):
+    """
+    Same results as backtest() (trade log, final value, max drawdown, return %),
+    without iterating over every row.
+
+    Cash and shares only change on rows carrying a Buy/Sell signal, so those rows
+    are walked in order (same rules as backtest(), including a Buy re-sizing
+    `shares` from the remaining cash), then held constant in between with a
+    forward fill. Portfolio value, running peak and drawdown are whole-array ops.
+
+    :param data: DataFrame with 'Open', 'Signal', 'Solid_Buy', 'Solid_Sell'
+    :param initial_cash: The initial cash amount for the portfolio
+    :param return_equity: also return the portfolio value per row as a Series
+    :return: trade_df, portfolio_value, max_drawdown, final_return_percentage (, equity)
+    """
+    price = data['Open'].to_numpy(dtype='float64')
+    buy, sell = signal_arrays(data)
+    n = len(price)
+
+    # --- state changes on signal rows only ---
+    events = np.flatnonzero(buy | sell)
+    ev_cash = np.empty(len(events))
+    ev_shares = np.empty(len(events))
+    cash, shares = initial_cash, 0
+    trade_log = []
+    index = data.index
+    for k, i in enumerate(events):
+        p = price[i]
+        if buy[i] and cash > 0:
+            shares = cash // p
+            cash -= shares * p
+            trade_log.append((index[i], 'Buy', shares, p, cash))
+        if sell[i] and shares > 0:
+            cash += shares * p
+            trade_log.append((index[i], 'Sell', shares, p, cash))
+            shares = 0
+        ev_cash[k], ev_shares[k] = cash, shares
+
+    # --- carry cash/shares forward to every row ---
+    # slot 0 is the starting state, slot k+1 the state after event k
+    state_idx = np.searchsorted(events, np.arange(n), side='right')
+    cash_t = np.concatenate(([initial_cash], ev_cash))[state_idx]
+    shares_t = np.concatenate(([0], ev_shares))[state_idx]
+
+    equity = cash_t + shares_t * price
+    # max() in the loop skips NaN values, so use fmax here
+    peak = np.fmax.accumulate(np.concatenate(([initial_cash], equity)))[1:]
+    drawdown = (peak - equity) / peak
+    max_drawdown = float(np.fmax.reduce(np.concatenate(([0], drawdown))))
+
+    portfolio_value = equity[-1] if n else initial_cash
+    trade_df = pd.DataFrame(trade_log, columns=['Date', 'Action', 'Shares', 'Price', 'Cash'])
+    final_return_percentage = ((portfolio_value - initial_cash) / initial_cash) * 100
+
+    if return_equity:
+        return trade_df, portfolio_value, max_drawdown, final_return_percentage, \
+               pd.Series(equity, index=data.index, name='Equity')
+    return trade_df, portfolio_value, max_drawdown, final_return_percentage
+
+
+if __name__ == "__main__":
+    pass
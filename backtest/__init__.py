@@ -1,3 +1,4 @@
 # __init__.py
 
-from .DailyBacktest import *
\ No newline at end of file
+from .DailyBacktest import *
+from .VectorBacktest import *
\ No newline at end of file
@@ -7,11 +7,15 @@ import pandas as pd
 import yfinance as yf
 from curl_cffi import requests  # pip3 install curl_cffi
 
+from data.priceStore import append_prices, read_prices, has_ticker
+from data.priceManifest import record_write
+
 # -------------------- CONFIG --------------------
 TICKERS     = ["AAPL", "MSFT", "NVDA", "AMZN"]   
 SAVE_DIR    = "Data/yahoo"                        # folder under cwd
 START_DATE  = "2025-01-01"                        # first-time full download start
 AUTO_ADJUST = False                               # True -> adjusted OHLCV
+STORE_BACKEND = "parquet"                         # "parquet" -> append-only data.priceStore; "csv" -> legacy CSV+PKL rewrite
 # ------------------------------------------------
 
 # One browser-impersonated session reused for all yfinance calls
@@ -39,6 +43,15 @@ def _read_existing(csv_path):
         print(f"[WARN] Failed to read existing CSV {csv_path}: {e}")
         return None
 
+def _store_dir(base_dir):
+    return os.path.join(base_dir, "store")
+
+def _read_master(ticker, base_dir):
+    if STORE_BACKEND == "parquet" and has_ticker(ticker, _store_dir(base_dir)):
+        return read_prices(ticker, store_dir=_store_dir(base_dir))
+    csv_path, _ = _paths(ticker, base_dir)
+    return _read_existing(csv_path)
+
 def _download_history(ticker, start, end):
     """
     end is exclusive per yfinance when using history(start=..., end=...).
@@ -53,6 +66,14 @@ def _download_history(ticker, start, end):
     return df[["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]].copy()
 
 def _append_and_save(ticker, existing, new_df, base_dir):
+    if STORE_BACKEND == "parquet":
+        store_dir = _store_dir(base_dir)
+        if existing is not None and not existing.empty and not has_ticker(ticker, store_dir):
+            append_prices(ticker, existing, store_dir)
+        rows = append_prices(ticker, new_df, store_dir)
+        print(f"[OK] Appended {ticker}: {store_dir} | new rows={rows}")
+        return
+
     if existing is None:
         combined = new_df.copy()
     else:
@@ -63,11 +84,11 @@ def _append_and_save(ticker, existing, new_df, base_dir):
     csv_path, pkl_path = _paths(ticker, base_dir)
     combined.to_csv(csv_path, index=True)
     combined.to_pickle(pkl_path)
+    record_write(ticker, combined, base_dir, source="yfinance", replace=True)
     print(f"[OK] Saved {ticker}: {csv_path} and {pkl_path} | rows={len(combined)}")
 
 def update_or_init_ticker(ticker, base_dir, start_date):
-    csv_path, _ = _paths(ticker, base_dir)
-    existing = _read_existing(csv_path)
+    existing = _read_master(ticker, base_dir)
 
     if existing is None or existing.empty:
         # First-time full history
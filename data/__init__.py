@@ -1,3 +1,7 @@
 # data/__init__.py
 
-from .dataLoader import *
\ No newline at end of file
+from .dataLoader import *
+from .priceStore import *
+from .priceManifest import *
+from .pricePanel import *
+from .panelCache import *
\ No newline at end of file
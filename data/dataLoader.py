@@ -1,60 +1,263 @@
 import os
+import io
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import numpy as np
 import pandas as pd
 import yfinance as yf
 from utils.symbols import *
 from utils.corepath import *
+from data.priceStore import read_prices, has_ticker, PRICE_DTYPES
 
+CSV_DATE_FORMAT = "%Y-%m-%d"
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
 
-def load_data(startdate, enddate, tickers, col=None):
 
-    # Load historical data for each ticker
-    
-    start_ts = pd.to_datetime(startdate)
-    end_ts = pd.to_datetime(enddate)
+def _csv_layout(csv_path):
+    """
+    Inspect the first lines of a price CSV.
+    Returns (columns, n_extra_header_rows): yfinance MultiIndex output leaves a
+    ticker-symbol row (`,AAPL,AAPL,...`) and sometimes a `Date,,,` row after the header.
+    """
+    with open(csv_path, "r", newline="") as f:
+        columns = f.readline().rstrip("\r\n").split(",")
+        n_extra = 0
+        for _ in range(2):
+            line = f.readline()
+            if not line or _DATE_RE.match(line):
+                break
+            n_extra += 1
+    if columns[0] in ("Price", ""):
+        columns[0] = "Date"
+    return columns, n_extra
+
+
+def read_price_csv(csv_path, normalize=False):
+    """
+    Read a <TICKER>.csv price file with typed columns.
+
+    - Skips the extra ticker-symbol header row(s) left over from yfinance.
+    - Parses Date with a fixed format and reads prices as float64, Volume as int64.
+    - normalize=True rewrites the file in place without the extra header rows,
+      so later reads (and other tools) see a plain one-header CSV.
+    Returns a DataFrame with a datetime64 'Date' column.
+    """
+    columns, n_extra = _csv_layout(csv_path)
+    dtypes = {c: PRICE_DTYPES.get(c, "float64") for c in columns[1:]}
+    read_kw = dict(header=0, names=columns, skiprows=range(1, n_extra + 1),
+                   parse_dates=["Date"], date_format=CSV_DATE_FORMAT)
+    try:
+        df = pd.read_csv(csv_path, dtype=dtypes, **read_kw)
+    except ValueError:
+        # e.g. missing Volume values can't be int64; keep them as float64
+        df = pd.read_csv(csv_path, dtype={c: "float64" for c in columns[1:]}, **read_kw)
+
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce", utc=True).dt.tz_localize(None)
+        df = df.dropna(subset=["Date"])
+
+    if normalize and n_extra:
+        tmp_path = csv_path + ".tmp"
+        df.to_csv(tmp_path, index=False, date_format=CSV_DATE_FORMAT)
+        os.replace(tmp_path, csv_path)
+
+    return df
+
+
+def _seek_date(f, key, lo, hi):
+    """
+    Binary search a date-sorted CSV opened in binary mode.
+    Returns the byte offset of the first line in [lo, hi) whose leading
+    YYYY-MM-DD is >= `key` (bytes), or `hi` if there is none. `lo` must be a line start.
+    """
+    while lo < hi:
+        mid = (lo + hi) // 2
+        f.seek(mid - 1)
+        f.readline()                 # move to the first line start >= mid
+        line_start = f.tell()
+        line = f.readline()
+        if line and line_start < hi and line[:10] < key:
+            lo = line_start + len(line)
+        else:
+            hi = mid
+    return lo
+
+
+def read_price_csv_range(csv_path, start=None, end=None, columns=None):
+    """
+    Read only [start, end] and only `columns` of a date-sorted price CSV.
+
+    The two date bounds are located by binary search on byte offsets, so a short
+    window costs about the rows in the window instead of the whole file.
+    Falls back to a full read_price_csv (then filters) if the first or last data
+    line doesn't start with a YYYY-MM-DD date, or the last date is before the
+    first, i.e. the file doesn't look date-sorted.
+    Returns a DataFrame with a datetime64 'Date' column plus the requested columns.
+    """
+    names, n_extra = _csv_layout(csv_path)
+    usecols = ["Date"] + [c for c in (columns or names[1:]) if c != "Date"]
+
+    with open(csv_path, "rb") as f:
+        for _ in range(1 + n_extra):
+            f.readline()
+        data_start = f.tell()
+        first_line = f.readline().decode("ascii", "ignore")
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - 4096, data_start))
+        tail = f.read().decode("ascii", "ignore").splitlines()
+        last_line = next((l for l in reversed(tail) if l.strip()), first_line)
+
+        if first_line and (not _DATE_RE.match(first_line) or not _DATE_RE.match(last_line)
+                           or last_line[:10] < first_line[:10]):
+            df = read_price_csv(csv_path)
+            mask = pd.Series(True, index=df.index)
+            if start is not None:
+                mask &= df["Date"] >= pd.to_datetime(start)
+            if end is not None:
+                mask &= df["Date"] <= pd.to_datetime(end)
+            return df.loc[mask, usecols].reset_index(drop=True)
+
+        lo = data_start
+        if start is not None:
+            key = pd.to_datetime(start).strftime(CSV_DATE_FORMAT).encode()
+            lo = _seek_date(f, key, data_start, size)
+        hi = size
+        if end is not None:
+            key = (pd.to_datetime(end).normalize() + pd.Timedelta(days=1)).strftime(CSV_DATE_FORMAT).encode()
+            hi = _seek_date(f, key, lo, size)
+
+        f.seek(lo)
+        chunk = f.read(max(hi - lo, 0))
+        # empty window: still parse one row so the result has the same dtypes
+        empty = not chunk.strip()
+        if empty:
+            chunk = first_line.encode("ascii")
+
+    dtypes = {c: ("float64" if PRICE_DTYPES.get(c) == "int64" else PRICE_DTYPES.get(c, "float64"))
+              for c in usecols[1:]}
+    df = pd.read_csv(io.BytesIO(chunk), header=None, names=names, usecols=usecols,
+                     dtype=dtypes, parse_dates=["Date"], date_format=CSV_DATE_FORMAT)
+    if "Volume" in df.columns and df["Volume"].notna().all():
+        df["Volume"] = df["Volume"].astype("int64")
+    if empty:
+        df = df.iloc[0:0]
+    # exact bounds (the byte search works at day resolution)
+    if start is not None:
+        df = df[df["Date"] >= pd.to_datetime(start)]
+    if end is not None:
+        df = df[df["Date"] <= pd.to_datetime(end)]
+    return df[usecols].reset_index(drop=True)
 
+
+def _read_ticker(t, start=None, end=None, columns=None):
+    """
+    Read one ticker with a 'Date' column, preferring the parquet store
+    (typed, no date parsing) and falling back to <data_path>/<t>.csv.
+    start/end/columns are pushed down into the read.
+    Returns None if neither exists.
+    """
+    if has_ticker(t, store_path):
+        return read_prices(t, start, end, columns=columns, store_dir=store_path).reset_index()
+    csv_path = os.path.join(data_path, f"{t}.csv")
+    if not os.path.exists(csv_path):
+        return None
+    if start is None and end is None and columns is None:
+        return read_price_csv(csv_path)
+    return read_price_csv_range(csv_path, start, end, columns=columns)
+
+
+def load_data(startdate, enddate, tickers, col=None):
+    """
+    Load [startdate, enddate] for each ticker, reading only that range and,
+    if `col` is given, only those columns (from the parquet store when the
+    ticker is there, otherwise by binary search in its CSV).
+
+    :return: {ticker: DataFrame}; with `col`, frames are Date-indexed and the
+             first requested column is renamed to the ticker.
+    """
     data = {}
 
     for t in tickers:
-        csv_path = os.path.join(data_path, f"{t}.csv")
-        if not os.path.exists(csv_path):
-            print(f"[MISSING] {t}: CSV not found at {csv_path}")
-            continue
         try:
-            df = pd.read_csv(csv_path, parse_dates=["Date"])
-            mask = (df["Date"] >= start_ts) & (df["Date"] <= end_ts)
-            df = df.loc[mask].copy()
+            df = _read_ticker(t, startdate, enddate, columns=col)
+            if df is None:
+                print(f"[MISSING] {t}: not found in {store_path} or {data_path}")
+                continue
             if col:
+                df = df.set_index("Date")
                 df = df[col]
                 df = df.rename(columns = {df.columns[0]: t})
             data[t] = df
             print(f"[LOADED] {t}: {len(df)} rows")
         except Exception as e:
-            print(f"[ERR] {t}: failed to read {csv_path} ({e})")
+            print(f"[ERR] {t}: failed to read ({e})")
 
     return data
 
 
-def load_all_data():
+# Result of load_universe:
+#   data     {ticker: DataFrame} in the requested ticker order
+#   timings  {ticker: seconds spent reading that file}
+#   failures {ticker: error string}
+#   missing  [tickers found neither in the store nor as CSV]
+#   elapsed  wall-clock seconds for the whole load
+LoadReport = namedtuple("LoadReport", ["data", "timings", "failures", "missing", "elapsed"])
 
-    # Load historical data for all
-    all_data = {}
 
-    for t in TICKERS:
-        csv_path = os.path.join(data_path, f"{t}.csv")
-        if not os.path.exists(csv_path):
-            print(f"[MISSING] {t}: CSV not found at {csv_path}")
-            continue
-        try:
-            df = pd.read_csv(csv_path, parse_dates=["Date"])
-            # df.set_index("Date", inplace=True)
-            # df.sort_index(inplace=True)
-            all_data[t] = df
-            print(f"[LOADED] {t}: {len(df)} rows")
-        except Exception as e:
-            print(f"[ERR] {t}: failed to read {csv_path} ({e})")
+def _load_one(t, start=None, end=None, columns=None):
+    t0 = time.perf_counter()
+    df = _read_ticker(t, start, end, columns)
+    return df, time.perf_counter() - t0
+
+
+def load_universe(tickers=None, max_workers=None, executor="thread", start=None, end=None, columns=None):
+    """
+    Load many tickers concurrently.
+
+    :param tickers: tickers to load (default: TICKERS); duplicates are read once
+    :param max_workers: pool size (default: the executor's own default)
+    :param executor: "thread" (I/O bound, default) or "process" (CPU bound CSV parsing)
+    :param start, end, columns: optional date range / column pushdown, as in load_data
+    :return: LoadReport with the data and per-file timings / failures
+    """
+    tickers = list(dict.fromkeys(TICKERS if tickers is None else tickers))
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+
+    t0 = time.perf_counter()
+    results, timings, failures, missing = {}, {}, {}, []
+    with pool_cls(max_workers=max_workers) as pool:
+        futures = {pool.submit(_load_one, t, start, end, columns): t for t in tickers}
+        for fut in as_completed(futures):
+            t = futures[fut]
+            try:
+                df, secs = fut.result()
+            except Exception as e:
+                failures[t] = f"{type(e).__name__}: {e}"
+                continue
+            timings[t] = secs
+            if df is None:
+                missing.append(t)
+            else:
+                results[t] = df
+
+    data = {t: results[t] for t in tickers if t in results}
+    missing = [t for t in tickers if t in missing]
+    return LoadReport(data, timings, failures, missing, time.perf_counter() - t0)
+
+
+def load_all_data(max_workers=None, executor="thread"):
+
+    # Load historical data for all, in parallel
+    report = load_universe(TICKERS, max_workers=max_workers, executor=executor)
+    print(f"[LOADED] {len(report.data)} tickers in {report.elapsed:.2f}s "
+          f"(missing={len(report.missing)}, failed={len(report.failures)})")
+    for t, err in report.failures.items():
+        print(f"[ERR] {t}: failed to read ({err})")
 
-    return all_data
+    return report.data
 
 
 if __name__ == "__main__":
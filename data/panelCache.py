@@ -0,0 +1,139 @@
+import os
+import json
+import struct
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from utils.symbols import *
+from utils.corepath import *
+from data.pricePanel import PricePanel, PANEL_FIELDS, load_panel
+from data.priceManifest import load_manifest
+
+# Binary PricePanel cache, opened with np.memmap (no parsing, shared page cache):
+#
+#   b"PXPANEL1" | uint64 little-endian header length | JSON header | pad to 64 bytes
+#   | float64 array (n_fields, n_dates, n_tickers), C order
+#
+# The header holds the ticker list, the date axis (ISO days), the field order and
+# the manifest last_date of every ticker at build time (used to detect staleness).
+
+_MAGIC = b"PXPANEL1"
+_ALIGN = 64
+
+
+def build_panel_cache(panel, path=panel_cache_path, manifest=None, requested=None):
+    """
+    Write `panel` to `path` (atomically, so running readers keep their old mapping).
+    `manifest` is the price manifest the panel was built from; its last dates are
+    recorded so load_panel_cached can tell when the cache is behind the store.
+    `requested` lists every ticker asked for, including ones that had no data.
+    """
+    fields = list(panel.fields)
+    header = {
+        "version": 1,
+        "tickers": panel.tickers,
+        "requested": list(requested) if requested is not None else panel.tickers,
+        "dates": [d.strftime("%Y-%m-%d") for d in panel.dates],
+        "fields": fields,
+        "dtype": "<f8",
+        "built": datetime.now().isoformat(timespec="seconds"),
+        "last_dates": {t: manifest[t]["last_date"]
+                       for t in panel.tickers if manifest and t in manifest},
+    }
+    blob = json.dumps(header).encode("utf-8")
+    data_offset = len(_MAGIC) + 8 + len(blob)
+    data_offset += (-data_offset) % _ALIGN
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<Q", len(blob)))
+        f.write(blob)
+        f.write(b"\0" * (data_offset - f.tell()))
+        for field in fields:
+            f.write(np.ascontiguousarray(panel[field], dtype="<f8").tobytes())
+    os.replace(tmp_path, path)
+    print(f"[CACHE] Wrote {path}: {len(panel.dates)} dates x {len(panel.tickers)} tickers")
+
+
+def read_cache_header(path=panel_cache_path):
+    """Return (header dict, byte offset of the array data)."""
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a panel cache")
+        (n,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(n).decode("utf-8"))
+    data_offset = len(_MAGIC) + 8 + n
+    data_offset += (-data_offset) % _ALIGN
+    return header, data_offset
+
+
+def open_panel_cache(path=panel_cache_path):
+    """Open the cache as a read-only PricePanel whose arrays are np.memmap views."""
+    header, data_offset = read_cache_header(path)
+    tickers, fields = header["tickers"], header["fields"]
+    dates = pd.DatetimeIndex(np.array(header["dates"], dtype="datetime64[D]"))
+    shape = (len(fields), len(dates), len(tickers))
+    if 0 in shape:
+        arr = np.empty(shape)
+    else:
+        arr = np.memmap(path, dtype=header["dtype"], mode="r", offset=data_offset, shape=shape)
+    return PricePanel(dates, tickers, {f: arr[i] for i, f in enumerate(fields)})
+
+
+def source_manifest():
+    """
+    Manifest entries of the files load_panel reads: the parquet store's entry for
+    tickers in the store, the CSV directory's (STORE_BACKEND="csv") otherwise.
+    """
+    return {**load_manifest(data_path), **load_manifest(store_path)}
+
+
+def build_universe_cache(tickers=None, path=panel_cache_path, fields=PANEL_FIELDS):
+    """Load the full universe from storage and write it to the cache."""
+    tickers = list(dict.fromkeys(TICKERS if tickers is None else tickers))
+    manifest = source_manifest()
+    panel = load_panel(tickers, fields=fields)
+    build_panel_cache(panel, path, manifest, requested=tickers)
+    return panel
+
+
+def _cache_is_current(header, tickers, fields):
+    if not set(tickers) <= set(header.get("requested", header["tickers"])) \
+            or not set(fields) <= set(header["fields"]):
+        return False
+    manifest = source_manifest()
+    built = header.get("last_dates", {})
+    return all(manifest[t]["last_date"] == built.get(t) for t in tickers if t in manifest)
+
+
+def load_panel_cached(tickers=None, start=None, end=None, fields=PANEL_FIELDS, path=panel_cache_path):
+    """
+    PricePanel for `tickers` from the memory-mapped cache; rebuilds the cache
+    first if it is missing, lacks a ticker/field, or is behind the price manifest.
+    Tickers with no data anywhere are left out. The arrays stay memory-mapped
+    views when `tickers` is a contiguous run of the cached order (TICKERS, or a
+    slice of it); see PricePanel.sel.
+    """
+    tickers = list(dict.fromkeys(TICKERS if tickers is None else tickers))
+    fields = list(fields)
+
+    panel = None
+    if os.path.exists(path):
+        try:
+            header, _ = read_cache_header(path)
+            if _cache_is_current(header, tickers, fields):
+                panel = open_panel_cache(path)
+        except Exception as e:
+            print(f"[WARN] Failed to open panel cache {path}: {e}")
+    if panel is None:
+        wanted = list(dict.fromkeys(TICKERS + tickers))
+        panel = build_universe_cache(wanted, path, PANEL_FIELDS)
+
+    return panel.sel([t for t in tickers if t in panel], start, end, fields)
+
+
+if __name__ == "__main__":
+    build_universe_cache()
@@ -0,0 +1,116 @@
+import os
+import json
+import zlib
+from datetime import datetime
+
+import pandas as pd
+
+# Small per-directory index of what each price file holds:
+#
+#   <dir>/_manifest.json  ->  {ticker: {first_date, last_date, rows, checksum, source, updated}}
+#
+# Every write path updates it, so "which tickers are stale and from which date
+# do they need fetching" is answered for the whole universe from this one file,
+# without opening any price file.
+
+MANIFEST_FILE = "_manifest.json"
+
+
+def manifest_path(base_dir):
+    return os.path.join(base_dir, MANIFEST_FILE)
+
+
+def load_manifest(base_dir):
+    path = manifest_path(base_dir)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Failed to read manifest {path}: {e}")
+        return {}
+
+
+def save_manifest(manifest, base_dir):
+    os.makedirs(base_dir, exist_ok=True)
+    path = manifest_path(base_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def frame_checksum(df, prev=0):
+    """crc32 over the row hashes of `df`, chained onto `prev` for appends."""
+    h = pd.util.hash_pandas_object(df, index=True).values
+    return zlib.crc32(h.tobytes(), prev)
+
+
+def record_write(ticker, new_df, base_dir, source, replace=False):
+    """
+    Update the ticker's manifest entry after `new_df` was written.
+
+    - replace=True : `new_df` is the ticker's full history (full rewrite, migration, compaction).
+    - replace=False: `new_df` was appended; dates outside the known range count as new rows.
+    Returns the new entry.
+    """
+    if new_df is None or new_df.empty:
+        return None
+    idx = pd.DatetimeIndex(new_df.index)
+
+    manifest = load_manifest(base_dir)
+    entry = None if replace else manifest.get(ticker)
+
+    first, last = idx.min(), idx.max()
+    if entry is None:
+        rows = len(idx.unique())
+        checksum = frame_checksum(new_df)
+    else:
+        prev_first = pd.Timestamp(entry["first_date"])
+        prev_last = pd.Timestamp(entry["last_date"])
+        new_dates = idx.unique()
+        rows = entry["rows"] + int(((new_dates > prev_last) | (new_dates < prev_first)).sum())
+        first, last = min(first, prev_first), max(last, prev_last)
+        checksum = frame_checksum(new_df, int(entry["checksum"], 16))
+
+    manifest[ticker] = {
+        "first_date": first.date().isoformat(),
+        "last_date": last.date().isoformat(),
+        "rows": rows,
+        "checksum": f"{checksum:08x}",
+        "source": source,
+        "updated": datetime.now().isoformat(timespec="seconds"),
+    }
+    save_manifest(manifest, base_dir)
+    return manifest[ticker]
+
+
+def last_date(ticker, base_dir, manifest=None):
+    """Last stored date (datetime.date) for `ticker`, or None if it has no entry."""
+    manifest = load_manifest(base_dir) if manifest is None else manifest
+    entry = manifest.get(ticker)
+    return None if entry is None else pd.Timestamp(entry["last_date"]).date()
+
+
+def plan_updates(tickers, base_dir, start_date, today):
+    """
+    Decide what every ticker needs from one manifest read.
+
+    Returns (groups, up_to_date):
+      - groups:     {fetch_from ISO date: [tickers]}; tickers without an entry fetch from
+                    `start_date`, the others from their last stored date (1-day overlap).
+      - up_to_date: tickers whose last stored date is >= `today`.
+    """
+    manifest = load_manifest(base_dir)
+    groups, up_to_date = {}, []
+    first_fetch = pd.to_datetime(start_date).date().isoformat()
+    for t in dict.fromkeys(tickers):
+        last_dt = last_date(t, base_dir, manifest)
+        if last_dt is None:
+            groups.setdefault(first_fetch, []).append(t)
+        elif last_dt >= today:
+            up_to_date.append(t)
+        else:
+            groups.setdefault(last_dt.isoformat(), []).append(t)
+    return groups, up_to_date
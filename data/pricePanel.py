@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from utils.symbols import *
+from data.dataLoader import load_universe
+
+PANEL_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class PricePanel:
+    """
+    OHLCV for a whole ticker universe on one shared trading-date axis.
+
+    Each field is a contiguous float64 array of shape (n_dates, n_tickers);
+    a missing bar is NaN in every field (Volume included, hence float64).
+    Slicing by date range returns views; slicing by ticker returns views too
+    when the tickers are a contiguous run in panel order, and copies only the
+    selected columns otherwise.
+    """
+
+    def __init__(self, dates, tickers, values):
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        self.tickers = list(tickers)
+        self.values = {f: np.asarray(v) for f, v in values.items()}
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        for f, v in self.values.items():
+            if v.shape != (len(self.dates), len(self.tickers)):
+                raise ValueError(f"field {f}: shape {v.shape} does not match "
+                                 f"{len(self.dates)} dates x {len(self.tickers)} tickers")
+
+    def __repr__(self):
+        span = (f"{self.dates[0].date()} → {self.dates[-1].date()}"
+                if len(self.dates) else "empty")
+        return (f"PricePanel({len(self.dates)} dates x {len(self.tickers)} tickers, "
+                f"fields={self.fields}, {span})")
+
+    def __getitem__(self, field):
+        return self.values[field]
+
+    def __contains__(self, ticker):
+        return ticker in self._pos
+
+    @property
+    def fields(self):
+        return list(self.values)
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.tickers)
+
+    @property
+    def mask(self):
+        """True where the ticker has a bar on that date."""
+        key = "Close" if "Close" in self.values else self.fields[0]
+        return ~np.isnan(self.values[key])
+
+    def frame(self, field):
+        """dates x tickers DataFrame for one field (wraps the array, no copy)."""
+        return pd.DataFrame(self.values[field], index=self.dates, columns=self.tickers, copy=False)
+
+    def ticker_frame(self, ticker, dropna=True):
+        """Date-indexed OHLCV DataFrame for one ticker (like a per-ticker CSV)."""
+        i = self._pos[ticker]
+        df = pd.DataFrame({f: v[:, i] for f, v in self.values.items()}, index=self.dates)
+        if dropna:
+            df = df[self.mask[:, i]]
+        return df
+
+    def to_frames(self):
+        """{ticker: DataFrame} with a 'Date' column, the shape load_all_data returns."""
+        return {t: self.ticker_frame(t).reset_index() for t in self.tickers}
+
+    def sel(self, tickers=None, start=None, end=None, fields=None):
+        """
+        Sub-panel by ticker list, inclusive date range and/or fields.
+        Unknown tickers raise KeyError.
+
+        The arrays are views of this panel's (no copy, so a memory-mapped panel
+        stays mapped) when `tickers` is None or a contiguous run of self.tickers
+        in the same order; any other ticker list is gathered into new arrays.
+        """
+        lo = 0 if start is None else self.dates.searchsorted(pd.to_datetime(start), side="left")
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.to_datetime(end), side="right")
+        fields = self.fields if fields is None else list(fields)
+
+        if tickers is None:
+            cols = slice(None)
+            tickers = self.tickers
+        else:
+            tickers = list(tickers)
+            cols = _as_slice([self._pos[t] for t in tickers])
+
+        values = {f: self.values[f][lo:hi, cols] for f in fields}
+        return PricePanel(self.dates[lo:hi], tickers, values)
+
+    @classmethod
+    def from_frames(cls, frames, fields=PANEL_FIELDS):
+        """
+        Build a panel from {ticker: DataFrame}. Frames may carry the date in a
+        'Date' column or as their index. The date axis is the union of all dates.
+        """
+        frames = {t: (df.set_index("Date") if "Date" in df.columns else df)
+                  for t, df in frames.items()}
+        frames = {t: df[~df.index.duplicated(keep="last")] for t, df in frames.items()}
+        tickers = list(frames)
+        if frames:
+            dates = pd.DatetimeIndex(np.unique(np.concatenate(
+                [pd.DatetimeIndex(df.index).values for df in frames.values()])))
+        else:
+            dates = pd.DatetimeIndex([])
+
+        values = {f: np.full((len(dates), len(tickers)), np.nan) for f in fields}
+        for j, t in enumerate(tickers):
+            df = frames[t]
+            rows = dates.get_indexer(pd.DatetimeIndex(df.index))
+            for f in fields:
+                if f in df.columns:
+                    values[f][rows, j] = df[f].to_numpy(dtype="float64", na_value=np.nan)
+        return cls(dates, tickers, values)
+
+
+def _as_slice(positions):
+    """slice equivalent to a list of column positions if they are consecutive, else the list."""
+    if not positions:
+        return slice(0, 0)
+    first = positions[0]
+    if positions == list(range(first, first + len(positions))):
+        return slice(first, first + len(positions))
+    return positions
+
+
+def load_panel(tickers=None, start=None, end=None, fields=PANEL_FIELDS, max_workers=None):
+    """
+    Build a PricePanel straight from storage (parquet store first, CSV otherwise),
+    reading only the requested range and fields. Missing tickers are left out.
+    """
+    report = load_universe(TICKERS if tickers is None else tickers, max_workers=max_workers,
+                           start=start, end=end, columns=list(fields))
+    for t, err in report.failures.items():
+        print(f"[ERR] {t}: failed to read ({err})")
+    return PricePanel.from_frames(report.data, fields)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,278 @@
+import os
+import re
+import glob
+import pandas as pd
+from utils.corepath import *
+from data.priceManifest import record_write
+
+# Partitioned, append-only parquet store (needs pyarrow: pip3 install pyarrow)
+#
+#   <store_dir>/<TICKER>/year=<YYYY>/part-<seq>_<first YYYYMMDD>_<last YYYYMMDD>.parquet
+#
+# Each write adds new part files holding only the new rows, so a daily update
+# costs O(new rows). Rows identical to what is already stored (the 1-day fetch
+# overlap) are dropped before writing. Readers concat the parts in `seq` order
+# and keep the last copy of any duplicated date, which matches the keep="last"
+# de-dup of the old CSV writer. Once a year holds more than MAX_PARTS_PER_YEAR
+# parts, append_prices() folds them back into one file (compact_ticker() does
+# the same for every year).
+
+PRICE_DTYPES = {
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Close": "float64",
+    "Adj Close": "float64",
+    "Volume": "int64",
+    "Dividends": "float64",
+    "Stock Splits": "float64",
+}
+
+MAX_PARTS_PER_YEAR = 8
+
+_PART_RE = re.compile(r"part-(\d+)_(\d{8})_(\d{8})\.parquet$")
+
+
+def _ticker_dir(ticker, store_dir):
+    return os.path.join(store_dir, ticker)
+
+
+def _normalize_prices(df):
+    """
+    Return a copy with a sorted, de-duplicated, tz-naive DatetimeIndex named Date
+    and typed price columns (float64 prices, int64 volume).
+    """
+    df = df.copy()
+    if "Date" in df.columns:
+        df = df.set_index("Date")
+    df.index = pd.to_datetime(df.index, errors="coerce")
+    df = df[df.index.notna()]
+    if getattr(df.index, "tz", None) is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = "Date"
+    df.columns.name = None
+
+    for c in df.columns:
+        dtype = PRICE_DTYPES.get(c, "float64")
+        col = pd.to_numeric(df[c], errors="coerce")
+        if dtype == "int64":
+            col = col.fillna(0)
+        df[c] = col.astype(dtype)
+
+    df = df[~df.index.duplicated(keep="last")]
+    df.sort_index(inplace=True)
+    return df
+
+
+def list_parts(ticker, store_dir=store_path):
+    """
+    List a ticker's part files as (seq, first_ts, last_ts, path), in write order.
+    Only file names are inspected; no parquet file is opened.
+    """
+    pattern = os.path.join(_ticker_dir(ticker, store_dir), "year=*", "part-*.parquet")
+    parts = []
+    for path in glob.glob(pattern):
+        m = _PART_RE.search(os.path.basename(path))
+        if not m:
+            continue
+        parts.append((int(m.group(1)),
+                      pd.Timestamp(m.group(2)),
+                      pd.Timestamp(m.group(3)),
+                      path))
+    parts.sort(key=lambda p: p[0])
+    return parts
+
+
+def has_ticker(ticker, store_dir=store_path):
+    return len(list_parts(ticker, store_dir)) > 0
+
+
+def _write_part(df, year_dir, seq):
+    os.makedirs(year_dir, exist_ok=True)
+    fname = f"part-{seq:06d}_{df.index[0]:%Y%m%d}_{df.index[-1]:%Y%m%d}.parquet"
+    tmp_path = os.path.join(year_dir, fname + ".tmp")
+    df.to_parquet(tmp_path, index=True)
+    os.replace(tmp_path, os.path.join(year_dir, fname))
+
+
+def _drop_unchanged(ticker, new_df, store_dir):
+    """Rows of `new_df` that are not already stored with identical values."""
+    stored = read_prices(ticker, start=new_df.index[0], end=new_df.index[-1], store_dir=store_dir)
+    if stored is None or stored.empty or not set(new_df.columns) <= set(stored.columns):
+        return new_df
+    common = new_df.index.intersection(stored.index)
+    if common.empty:
+        return new_df
+    a = new_df.loc[common]
+    b = stored.loc[common, new_df.columns]
+    same = ((a == b) | (a.isna() & b.isna())).all(axis=1)
+    return new_df.drop(same.index[same.to_numpy()])
+
+
+def _parts_by_year(parts):
+    by_year = {}
+    for p in parts:
+        by_year.setdefault(os.path.dirname(p[3]), []).append(p)
+    return by_year
+
+
+def _compact_year(year_parts, seq):
+    """Fold one year's parts (list_parts tuples) into a single part numbered `seq`."""
+    df = pd.concat([pd.read_parquet(p[3]) for p in year_parts], axis=0)
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    _write_part(df, os.path.dirname(year_parts[0][3]), seq)
+    for p in year_parts:
+        os.remove(p[3])
+
+
+def append_prices(ticker, new_df, store_dir=store_path, source="yfinance"):
+    """
+    Append `new_df` to the ticker's store, writing only these rows (split by year).
+    Rows already stored with identical values are skipped; changed rows supersede
+    the stored ones on read. A year left with more than MAX_PARTS_PER_YEAR parts
+    is compacted into one. The store's manifest entry is updated with `source`.
+    Returns the number of rows written.
+    """
+    if new_df is None or new_df.empty:
+        return 0
+    new_df = _normalize_prices(new_df)
+    if new_df.empty:
+        return 0
+
+    parts = list_parts(ticker, store_dir)
+    if parts:
+        new_df = _drop_unchanged(ticker, new_df, store_dir)
+        if new_df.empty:
+            return 0
+    seq = parts[-1][0] + 1 if parts else 0
+
+    years = []
+    for year, chunk in new_df.groupby(new_df.index.year):
+        year_dir = os.path.join(_ticker_dir(ticker, store_dir), f"year={year}")
+        _write_part(chunk, year_dir, seq)
+        years.append(year_dir)
+        seq += 1
+
+    # Same data before and after, so the manifest entry below stays valid
+    for year_dir, year_parts in _parts_by_year(list_parts(ticker, store_dir)).items():
+        if year_dir in years and len(year_parts) > MAX_PARTS_PER_YEAR:
+            _compact_year(year_parts, seq)
+            seq += 1
+
+    record_write(ticker, new_df, store_dir, source, replace=not parts)
+    return len(new_df)
+
+
+def read_prices(ticker, start=None, end=None, columns=None, store_dir=store_path):
+    """
+    Read a ticker from the store as a DataFrame with a typed DatetimeIndex.
+
+    - start/end: inclusive date bounds; parts entirely outside are never opened.
+    - columns: optional list of columns to read (projection pushdown).
+    Returns None if the ticker is not in the store.
+    """
+    parts = list_parts(ticker, store_dir)
+    if not parts:
+        return None
+
+    start_ts = pd.to_datetime(start) if start is not None else None
+    end_ts = pd.to_datetime(end) if end is not None else None
+
+    # Row-level filter on the Date index inside each part that is opened
+    filters = []
+    if start_ts is not None:
+        filters.append(("Date", ">=", start_ts))
+    if end_ts is not None:
+        filters.append(("Date", "<=", end_ts))
+
+    frames = []
+    for _, first, last, path in parts:
+        if start_ts is not None and last < start_ts.normalize():
+            continue
+        if end_ts is not None and first > end_ts:
+            continue
+        frames.append(pd.read_parquet(path, columns=columns, filters=filters or None))
+
+    if not frames:
+        return pd.read_parquet(parts[-1][3], columns=columns).iloc[0:0]
+
+    df = pd.concat(frames, axis=0) if len(frames) > 1 else frames[0]
+    if len(frames) > 1:
+        df = df[~df.index.duplicated(keep="last")]
+        df = df.sort_index()
+    if start_ts is not None or end_ts is not None:
+        df = df.loc[start_ts:end_ts]
+    return df
+
+
+def compact_ticker(ticker, store_dir=store_path):
+    """
+    Merge each year's part files into a single part (one rewrite per year that
+    has more than one part). Safe to run any time; readers see the same data.
+    """
+    parts = list_parts(ticker, store_dir)
+    seq = parts[-1][0] + 1 if parts else 0
+    compacted = False
+    for year_parts in _parts_by_year(parts).values():
+        if len(year_parts) < 2:
+            continue
+        compacted = True
+        _compact_year(year_parts, seq)
+        seq += 1
+
+    if compacted:
+        full = read_prices(ticker, store_dir=store_dir)
+        record_write(ticker, full, store_dir, source="compaction", replace=True)
+
+
+def rebuild_manifest(store_dir=store_path, source="rebuild"):
+    """Re-derive every ticker's manifest entry from its parts (reads the whole store once)."""
+    tickers = sorted(d for d in os.listdir(store_dir)
+                     if os.path.isdir(os.path.join(store_dir, d)))
+    for t in tickers:
+        df = read_prices(t, store_dir=store_dir)
+        if df is not None and not df.empty:
+            record_write(t, df, store_dir, source=source, replace=True)
+
+
+def _read_legacy_csv(csv_path):
+    """Read an old <TICKER>.csv, including the ones with a second ticker-symbol header row."""
+    df = pd.read_csv(csv_path)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["Date"])
+    return _normalize_prices(df)
+
+
+def migrate_csv_dir(csv_dir=data_path, store_dir=store_path, tickers=None, overwrite=False):
+    """
+    One-shot migration of <csv_dir>/<TICKER>.csv files into the parquet store.
+    Tickers already in the store are skipped unless overwrite=True.
+    Returns {ticker: rows written}.
+    """
+    if tickers is None:
+        tickers = sorted(os.path.splitext(os.path.basename(p))[0]
+                         for p in glob.glob(os.path.join(csv_dir, "*.csv")))
+
+    written = {}
+    for t in tickers:
+        csv_path = os.path.join(csv_dir, f"{t}.csv")
+        if not os.path.exists(csv_path):
+            print(f"[MISSING] {t}: CSV not found at {csv_path}")
+            continue
+        if has_ticker(t, store_dir):
+            if not overwrite:
+                print(f"[SKIP] {t}: already in store")
+                continue
+            for p in list_parts(t, store_dir):
+                os.remove(p[3])
+        try:
+            written[t] = append_prices(t, _read_legacy_csv(csv_path), store_dir,
+                                       source="csv-migration")
+            print(f"[MIGRATED] {t}: {written[t]} rows")
+        except Exception as e:
+            print(f"[ERR] {t}: failed to migrate {csv_path} ({e})")
+    return written
+
+
+if __name__ == "__main__":
+    migrate_csv_dir()
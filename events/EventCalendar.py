@@ -0,0 +1,237 @@
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from utils.corepath import event_calendar_path
+from events.EventStudy import event_study
+
+# Event calendar: named event series plus a batch runner.
+#
+# An event series is a DataFrame with a `date` column and an optional `ticker`
+# column. Market-wide events (FOMC, CPI, NFP, Jackson Hole) have no ticker and
+# apply to every stock in a universe; ticker-specific events (earnings) only to
+# the stock on that row.
+#
+# Built-in series are registered below; more are read from CSV files in
+# `event_calendar_path` (one file per event type, e.g. CPI.csv, NFP.csv,
+# EARNINGS.csv with `date` and optionally `ticker` columns).
+#
+# run_event_studies loads returns once for every ticker involved and runs one
+# event study per (event type x universe) job, jobs in a process pool.
+
+JACKSON_HOLE_DATES = [
+    "2009-08-21", "2010-08-27", "2011-08-26", "2012-08-31",
+    "2014-08-22", "2016-08-26",
+    "2018-08-24", "2019-08-23",
+    "2020-08-27",
+    "2021-08-27", "2022-08-26", "2023-08-25", "2024-08-23",
+    "2025-08-22",
+]
+
+# FOMC statement days (scheduled and unscheduled meetings)
+FOMC_DATES = [
+    "2020-01-29", "2020-03-03", "2020-03-15", "2020-04-29", "2020-06-10", "2020-07-29",
+    "2020-09-16", "2020-11-05", "2020-12-16",
+    "2021-01-27", "2021-03-17", "2021-04-28", "2021-06-16", "2021-07-28", "2021-09-22",
+    "2021-11-03", "2021-12-15",
+    "2022-01-26", "2022-03-16", "2022-05-04", "2022-06-15", "2022-07-27", "2022-09-21",
+    "2022-11-02", "2022-12-14",
+    "2023-02-01", "2023-03-22", "2023-05-03", "2023-06-14", "2023-07-26", "2023-09-20",
+    "2023-11-01", "2023-12-13",
+    "2024-01-31", "2024-03-20", "2024-05-01", "2024-06-12", "2024-07-31", "2024-09-18",
+    "2024-11-07", "2024-12-18",
+    "2025-01-29", "2025-03-19", "2025-05-07", "2025-06-18", "2025-07-30", "2025-09-17",
+    "2025-10-29", "2025-12-10",
+]
+
+_CALENDAR = {}
+
+
+def register_events(name, dates, tickers=None):
+    """
+    Add (or replace) the event series `name`.
+
+    :param dates: list of dates, or a DataFrame with a `date` column (and optionally `ticker`)
+    :param tickers: for a list of dates, None (market-wide) or the ticker of each date
+    """
+    if isinstance(dates, pd.DataFrame):
+        df = dates.copy()
+    else:
+        df = pd.DataFrame({"date": list(dates)})
+        if tickers is not None:
+            df["ticker"] = list(tickers)
+    if "date" not in df.columns:
+        raise ValueError(f"event series {name!r} needs a 'date' column")
+    df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+    if "ticker" in df.columns and df["ticker"].isna().all():
+        df = df.drop(columns="ticker")
+    _CALENDAR[name] = df.drop_duplicates().sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def load_event_csv(path, name=None):
+    """Register the events in one CSV file; the event type defaults to the file name."""
+    name = name or os.path.splitext(os.path.basename(path))[0].upper()
+    register_events(name, pd.read_csv(path))
+    return name
+
+
+def load_event_dir(path=event_calendar_path):
+    """Register every *.csv in `path`; returns the event types loaded."""
+    names = []
+    for f in sorted(glob.glob(os.path.join(path, "*.csv"))):
+        try:
+            names.append(load_event_csv(f))
+        except Exception as e:
+            print(f"[WARN] Failed to load event calendar {f}: {e}")
+    return names
+
+
+def list_event_types():
+    return sorted(_CALENDAR)
+
+
+def get_events(name, start=None, end=None, ticker=None):
+    """
+    Event series `name` between `start` and `end` as a DataFrame.
+    With `ticker`, ticker-specific series are filtered to that ticker.
+    """
+    if name not in _CALENDAR:
+        raise KeyError(f"unknown event type {name!r}, have {list_event_types()}")
+    df = _CALENDAR[name]
+    if start is not None:
+        df = df[df["date"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["date"] <= pd.Timestamp(end)]
+    if ticker is not None and "ticker" in df.columns:
+        df = df[df["ticker"] == ticker]
+    return df.reset_index(drop=True)
+
+
+def event_dates(name, start=None, end=None, ticker=None):
+    """Event dates of series `name` as a DatetimeIndex."""
+    return pd.DatetimeIndex(get_events(name, start, end, ticker)["date"].unique())
+
+
+def is_ticker_specific(name):
+    return "ticker" in _CALENDAR[name].columns
+
+
+register_events("JACKSON_HOLE", JACKSON_HOLE_DATES)
+register_events("FOMC", FOMC_DATES)
+
+
+# ---- batch runner ----
+
+_worker_rets = None
+
+
+def _init_worker(rets):
+    global _worker_rets
+    _worker_rets = rets
+
+
+def _run_job(event_type, universe, tickers, events, mkt, pre, post, model_kwargs, rets=None):
+    """
+    One event study. `events` is a DataFrame with `date` (and `ticker` for
+    ticker-specific series, which are run per ticker on that ticker's dates).
+    """
+    rets = _worker_rets if rets is None else rets
+    tickers = [t for t in tickers if t in rets.columns and t != mkt]
+    if "ticker" in events.columns:
+        parts = []
+        for t, grp in events[events["ticker"].isin(tickers)].groupby("ticker"):
+            parts.append(event_study(rets, [t], mkt, grp["date"], pre, post, **model_kwargs)[0])
+        results = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    elif tickers:
+        results = event_study(rets, tickers, mkt, events["date"], pre, post, **model_kwargs)[0]
+    else:
+        results = pd.DataFrame()
+    if len(results):
+        results.insert(0, "universe", universe)
+        results.insert(0, "event_type", event_type)
+    return results
+
+
+def load_event_returns(tickers, mkt, start, end):
+    """Daily Close-to-Close returns for `tickers` and `mkt`, loaded once from the panel cache."""
+    from data.panelCache import load_panel_cached
+    all_tickers = list(dict.fromkeys(list(tickers) + [mkt]))
+    px_df = load_panel_cached(all_tickers, start, end, fields=["Close"]).frame("Close")
+    return px_df.pct_change(fill_method=None).iloc[1:]
+
+
+def summarize_event_results(results, car_cols=("CAR_-1_to_+1", "CAR_-3_to_+3", "CAR_-5_to_+5")):
+    """Mean CARs and event counts per (event_type, universe, ticker)."""
+    keys = ["event_type", "universe", "ticker"]
+    summary = (results.groupby(keys)[list(car_cols)].mean()
+               .rename(columns=lambda c: c + "_avg"))
+    summary.insert(0, "n_events", results.groupby(keys).size())
+    return summary.reset_index()
+
+
+def run_event_studies(event_types=None, universes=None, mkt="SPY", pre=6, post=6, start=None, end=None,
+                      rets=None, max_workers=None, out_path=None, **model_kwargs):
+    """
+    Event study for every (event type x universe) combination.
+
+    :param event_types: registered event types (default: all)
+    :param universes: {name: [tickers]} (default: {'TICKERS': utils.symbols.TICKERS})
+    :param start, end: only events in this range
+    :param rets: returns DataFrame to use instead of loading from the panel cache
+    :param max_workers: process count; 1 runs in this process
+    :param out_path: CSV path for the combined per-event results (None: don't write)
+    :param model_kwargs: model, est_window, min_obs (see event_arrays)
+    :return: (combined results DataFrame with event_type/universe columns, summary DataFrame)
+    """
+    if universes is None:
+        from utils.symbols import TICKERS
+        universes = {"TICKERS": TICKERS}
+    event_types = list_event_types() if event_types is None else list(event_types)
+    events = {name: get_events(name, start, end) for name in event_types}
+    events = {name: ev for name, ev in events.items() if len(ev)}
+    if not events:
+        print("[WARN] No events to study")
+        return pd.DataFrame(), pd.DataFrame()
+
+    if rets is None:
+        all_dates = pd.concat([ev["date"] for ev in events.values()])
+        model = model_kwargs.get("model", "market_adjusted")
+        est_lo = model_kwargs.get("est_window", (-250, -11))[0]
+        lookback_days = 60 if model == "market_adjusted" else int(-est_lo * 1.5) + 60
+        tickers = sorted({t for u in universes.values() for t in u})
+        rets = load_event_returns(tickers, mkt,
+                                  (all_dates.min() - pd.Timedelta(days=lookback_days)).strftime("%Y-%m-%d"),
+                                  (all_dates.max() + pd.Timedelta(days=60)).strftime("%Y-%m-%d"))
+
+    jobs = [(name, uname, list(utickers), events[name], mkt, pre, post, model_kwargs)
+            for name in events for uname, utickers in universes.items()]
+    max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+
+    if max_workers <= 1 or len(jobs) == 1:
+        parts = [_run_job(*job, rets=rets) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(rets,)) as ex:
+            futures = [ex.submit(_run_job, *job) for job in jobs]
+            parts = [f.result() for f in futures]
+    parts = [p for p in parts if len(p)]
+    print(f"[EVENTS] {len(events)} event types x {len(universes)} universes "
+          f"({len(jobs)} jobs, {max_workers} workers)")
+    if not parts:
+        return pd.DataFrame(), pd.DataFrame()
+
+    results = pd.concat(parts, ignore_index=True)
+    summary = summarize_event_results(results)
+    if out_path:
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        results.to_csv(out_path, index=False)
+        print(f"[OK] Wrote {len(results)} event rows to {out_path}")
+    return results, summary
+
+
+if __name__ == "__main__":
+    load_event_dir()
+    results, summary = run_event_studies(
+        out_path=os.path.join(event_calendar_path, "event_study_results.csv"))
+    print(summary.to_string())
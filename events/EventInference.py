@@ -0,0 +1,215 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from events.EventStudy import event_arrays, event_positions, window_sum
+
+# Resampling-based significance for event CARs.
+#
+# A resample is a vector of counts (how often each event / candidate day was
+# drawn), drawn in batches with rng.multinomial. A batch of resampled means is
+# then one matrix product, counts @ CARs, for all tickers at once. Batches can
+# be spread over a process pool; each gets its own seed from one SeedSequence,
+# so results don't depend on the worker count.
+#
+#  - bootstrap: resample each ticker's events with replacement, mean CAR per draw
+#  - placebo:   pseudo-event days drawn from the same ticker history (away from
+#               the real events), CARs read off prefix sums of the daily AR
+
+CHUNK = 500
+
+
+def _seeds(seed, n_chunks):
+    return np.random.SeedSequence(seed).spawn(n_chunks)
+
+
+def _chunks(total, chunk):
+    return [min(chunk, total - i) for i in range(0, total, chunk)]
+
+
+def _run_chunks(func, args, sizes, seeds, max_workers):
+    if max_workers and max_workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            futures = [ex.submit(func, *args, size, s) for size, s in zip(sizes, seeds)]
+            return np.concatenate([f.result() for f in futures])
+    return np.concatenate([func(*args, size, s) for size, s in zip(sizes, seeds)])
+
+
+def _two_sided_p(draws, obs=None):
+    """
+    obs=None: share of the bootstrap distribution on the far side of 0 (x2).
+    Otherwise: share of (placebo) draws at least as extreme as |obs|.
+    """
+    with np.errstate(invalid="ignore"):
+        if obs is None:
+            lo = np.nanmean(draws <= 0, axis=0)
+            hi = np.nanmean(draws >= 0, axis=0)
+            return np.minimum(1., 2 * np.minimum(lo, hi))
+        valid = ~np.isnan(draws)
+        return (np.abs(np.where(valid, draws, 0)) >= np.abs(obs)).sum(axis=0) / valid.sum(axis=0)
+
+
+# ---- bootstrap over events ----
+
+def _event_groups(cars):
+    """
+    Group tickers by which events they have a CAR for (usually a handful of
+    patterns: tickers listed since different dates). Returns [(ticker columns,
+    events x columns CAR array)].
+    """
+    present = ~np.isnan(cars)
+    patterns, inverse = np.unique(present.T, axis=0, return_inverse=True)
+    groups = []
+    for g, pattern in enumerate(patterns):
+        cols = np.flatnonzero(inverse.ravel() == g)
+        if pattern.any():
+            groups.append((cols, cars[pattern][:, cols]))
+    return groups
+
+
+def _boot_chunk(groups, n_tickers, size, seed):
+    """`size` bootstrap means per ticker, resampling among that ticker's events."""
+    rng = np.random.default_rng(seed)
+    out = np.full((size, n_tickers), np.nan)
+    for cols, c in groups:
+        n = len(c)
+        counts = rng.multinomial(n, np.full(n, 1 / n), size=size)    # size x events
+        out[:, cols] = (counts @ c) / n
+    return out
+
+
+def bootstrap_car(ev, window=(-1, 1), n_boot=5000, ci=0.95, seed=None, max_workers=None, chunk=CHUNK):
+    """
+    Bootstrap the mean CAR over events, per ticker.
+
+    :param ev: EventData from event_arrays
+    :return: DataFrame indexed by ticker with n_events, mean_CAR, boot_se, ci_lo, ci_hi, p_boot
+    """
+    cars = np.where(ev.present, window_sum(ev, *window), np.nan)
+    counts = ev.present.sum(axis=0)
+    sizes = _chunks(n_boot, chunk)
+    boot = _run_chunks(_boot_chunk, (_event_groups(cars), len(ev.tickers)), sizes,
+                       _seeds(seed, len(sizes)), max_workers)
+
+    with np.errstate(invalid="ignore"):
+        obs = np.nanmean(cars, axis=0) if len(cars) else np.full(len(ev.tickers), np.nan)
+    a = (1 - ci) / 2
+    out = pd.DataFrame({
+        "n_events": counts,
+        "mean_CAR": obs,
+        "boot_se": np.nanstd(boot, axis=0, ddof=1),
+        "ci_lo": np.nanquantile(boot, a, axis=0),
+        "ci_hi": np.nanquantile(boot, 1 - a, axis=0),
+        "p_boot": _two_sided_p(boot),
+    }, index=pd.Index(ev.tickers, name="ticker"))
+    return out[out["n_events"] > 0]
+
+
+# ---- placebo event dates ----
+
+def _placebo_chunk(day_car, day_ok, count_groups, size, seed):
+    """
+    Mean placebo CAR per ticker for `size` placebo sets; the tickers in each
+    (n_events, columns) group get sets of n_events pseudo-events.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(day_car)
+    out = np.full((size, day_car.shape[1]), np.nan)
+    for n_events, cols in count_groups:
+        counts = rng.multinomial(n_events, np.full(n, 1 / n), size=size)    # size x candidate days
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, cols] = (counts @ day_car[:, cols]) / (counts @ day_ok[:, cols])
+    return out
+
+
+def daily_abnormal_returns(rets, tickers, mkt, model="market_adjusted", min_obs=60):
+    """
+    Daily AR over the whole history: stock - market, or for the market model the
+    residual of one full-history OLS per ticker (used for placebo dates, which
+    have no estimation window of their own).
+    """
+    y = rets[list(tickers)].to_numpy(dtype="float64")
+    x = rets[mkt].to_numpy(dtype="float64")[:, None]
+    if model == "market_adjusted":
+        return y - x
+    ok = ~(np.isnan(y) | np.isnan(x))
+    xv, yv = np.where(ok, x, 0.), np.where(ok, y, 0.)
+    n = ok.sum(axis=0)
+    sx, sy = xv.sum(axis=0), yv.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = (n * (xv * yv).sum(axis=0) - sx * sy) / (n * (xv * xv).sum(axis=0) - sx * sx)
+        alpha = (sy - beta * sx) / n
+    beta = np.where(n >= min_obs, beta, np.nan)
+    return y - (alpha + beta * x)
+
+
+def placebo_car(rets, tickers, mkt, dates, window=(-1, 1), n_placebo=1000, exclude=10,
+                seed=None, max_workers=None, chunk=CHUNK, model="market_adjusted", ev=None,
+                **model_kwargs):
+    """
+    Compare each ticker's mean event CAR with mean CARs over random placebo dates.
+
+    Placebo days are trading days whose CAR window fits in the data and that are
+    more than `exclude` days away from every real event. Each placebo set has as
+    many pseudo-events as the ticker has real events; tickers with none are left out.
+
+    :param ev: EventData for these tickers and dates covering `window`, if already built
+    :return: DataFrame indexed by ticker with n_events, mean_CAR, placebo_mean,
+             placebo_sd, p_placebo
+    """
+    tickers = list(tickers)
+    lo, hi = window
+    if ev is None:
+        ev = event_arrays(rets, tickers, mkt, dates, pre=max(-lo, 0), post=max(hi, 0),
+                          model=model, **model_kwargs)
+    obs = np.where(ev.present, window_sum(ev, lo, hi), np.nan)
+    n_events = ev.present.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        obs_mean = np.nansum(obs, axis=0) / (~np.isnan(obs)).sum(axis=0)
+
+    ar = daily_abnormal_returns(rets, tickers, mkt, model)
+    valid = ~np.isnan(ar)
+    prefix = np.vstack([np.zeros((1, ar.shape[1])), np.cumsum(np.where(valid, ar, 0.), axis=0)])
+    prefix_n = np.vstack([np.zeros((1, ar.shape[1])), np.cumsum(valid, axis=0)])
+
+    n_days = len(rets)
+    cand = np.arange(max(-lo, 0), n_days - max(hi, 0))
+    pos, _ = event_positions(rets.index, dates)
+    if len(pos):
+        near = (np.abs(cand[:, None] - pos[None, :]) <= exclude).any(axis=1)
+        cand = cand[~near]
+    if len(cand) == 0 or len(pos) == 0:
+        raise ValueError("no placebo days available for this history / event set")
+
+    # CAR over the window for every candidate day, from the prefix sums
+    day_ok = (prefix_n[cand + hi + 1] - prefix_n[cand + lo]) > 0
+    day_car = np.where(day_ok, prefix[cand + hi + 1] - prefix[cand + lo], 0.)
+
+    count_groups = [(int(k), np.flatnonzero(n_events == k)) for k in np.unique(n_events) if k > 0]
+    sizes = _chunks(n_placebo, chunk)
+    draws = _run_chunks(_placebo_chunk, (day_car, day_ok.astype("float64"), count_groups),
+                        sizes, _seeds(seed, len(sizes)), max_workers)
+    keep = n_events > 0
+    draws, obs_mean = draws[:, keep], obs_mean[keep]
+    return pd.DataFrame({
+        "n_events": n_events[keep],
+        "mean_CAR": obs_mean,
+        "placebo_mean": np.nanmean(draws, axis=0),
+        "placebo_sd": np.nanstd(draws, axis=0, ddof=1),
+        "p_placebo": np.where(np.isnan(obs_mean), np.nan, _two_sided_p(draws, obs_mean)),
+    }, index=pd.Index(np.asarray(tickers, dtype=object)[keep], name="ticker"))
+
+
+def car_significance(rets, tickers, mkt, dates, window=(-1, 1), n_boot=5000, n_placebo=1000,
+                     seed=None, max_workers=None, **model_kwargs):
+    """Bootstrap and placebo tests of the mean CAR over `window`, one row per ticker."""
+    ev = event_arrays(rets, tickers, mkt, dates, pre=max(-window[0], 0), post=max(window[1], 0),
+                      **model_kwargs)
+    boot = bootstrap_car(ev, window, n_boot, seed=seed, max_workers=max_workers)
+    plac = placebo_car(rets, tickers, mkt, dates, window, n_placebo, seed=seed,
+                       max_workers=max_workers, ev=ev, **model_kwargs)
+    return boot.join(plac.drop(columns=["n_events", "mean_CAR"]), how="left")
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,68 @@
+import pandas as pd
+from matplotlib.figure import Figure
+from utils.ChartRender import ChartJob, render_data_uris
+
+# Event-study report charts. Each function returns a matplotlib Figure built
+# without pyplot, so they can be drawn and cached by utils.ChartRender.
+
+
+def plot_mean_car(series, title_suffix):
+    """Mean CAR by rel_day, dashed line at E0."""
+    s = pd.Series(series).sort_index()
+    fig = Figure(figsize=(5, 3.2))
+    ax = fig.add_subplot(111)
+    ax.plot(s.index, s.values, marker="o")     # no explicit colors per instructions
+    ax.axvline(0, linestyle="--")              # E0 marker
+    ax.set_title(f"Mean CAR vs. rel_day — {title_suffix}")
+    ax.set_xlabel("Relative day (E0 = speech)")
+    ax.set_ylabel("Mean CAR")
+    return fig
+
+
+def plot_aggregate_barline(ticker, df):
+    """
+    df: index=rel_day, columns=[ticker, 'AR', 'CAR']
+    Bars = mean raw return (%), Lines = mean AR (%) and mean CAR (%)
+    """
+    df = df.sort_index()
+    fig = Figure(figsize=(5, 3.2))
+    ax1 = fig.add_subplot(111)
+    ax1.bar(df.index, df[ticker]*100, alpha=0.4, label=f"{ticker} mean return (%)")
+    ax1.axvline(0, linestyle="--")  # E0 marker
+    ax1.set_xlabel("Relative day (E0 = speech)")
+    ax1.set_ylabel(f"{ticker} mean raw return (%)")
+    ax2 = ax1.twinx()
+    # No explicit colors specified
+    ax2.plot(df.index, df["AR"]*100, marker="o", label="Mean AR (%)")
+    ax2.plot(df.index, df["CAR"]*100, marker="s", label="Mean CAR (%)")
+    # Merge legends
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1+lines2, labels1+labels2, loc="upper left")
+    ax1.set_title(f"{ticker}: Average across events (Bar+Line)")
+    return fig
+
+
+def event_chart_uris(mean_cars, mean_agg, max_workers=None, **render_kwargs):
+    """
+    Mean-CAR and bar/line chart per ticker, drawn in one render batch.
+    Returns {ticker: (mean CAR data URI or None, aggregate data URI or None)};
+    tickers without data for a chart get None instead of an empty figure.
+    """
+    tickers = sorted(set(mean_cars) | set(mean_agg))
+    jobs, slots = [], []
+    for t in tickers:
+        if mean_cars.get(t) is not None:
+            jobs.append(ChartJob(plot_mean_car, (mean_cars[t], t)))
+            slots.append((t, 0))
+        if mean_agg.get(t) is not None:
+            jobs.append(ChartJob(plot_aggregate_barline, (t, mean_agg[t])))
+            slots.append((t, 1))
+    out = {t: [None, None] for t in tickers}
+    for (t, side), uri in zip(slots, render_data_uris(jobs, max_workers=max_workers, **render_kwargs)):
+        out[t][side] = uri
+    return {t: tuple(v) for t, v in out.items()}
+
+
+if __name__ == "__main__":
+    pass
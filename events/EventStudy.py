@@ -0,0 +1,248 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Vectorized event study.
+#
+# All event windows for all tickers are gathered with one fancy-indexing step
+# into an (events x rel_day x tickers) array; AR, CAR, window sums, t-stats and
+# mean curves are then reductions over that array.
+#
+# Event day E0 is the first trading day on/after each event date (events after
+# the last date in `rets` are skipped). Windows are clipped at the ends of the
+# data; a missing return leaves a NaN that the reductions skip, like the
+# per-ticker dropna() in the original loop.
+
+AR_MODELS = ("market_adjusted", "market_model")
+
+EventData = namedtuple(
+    "EventData",
+    ["event_dates", "rel_days", "tickers", "mkt", "ret", "mkt_ret", "ar", "car", "present",
+     "alpha", "beta"],
+    defaults=(None, None))
+
+
+def event_positions(index, dates):
+    """
+    Row positions of E0 in `index` for each event date (first row on/after it).
+    Returns (positions, kept event dates as Timestamps); events past the end are dropped.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    pos = index.searchsorted(dates, side="left")
+    keep = pos < len(index)
+    return pos[keep], index[pos[keep]]
+
+
+def gather_windows(values, pos, pre, post):
+    """
+    values[(pos + rel) ] for rel in [-pre, post], as an (events x rel_day x ...) array.
+    Slots outside the data are NaN.
+    """
+    rel = np.arange(-pre, post + 1)
+    idx = pos[:, None] + rel[None, :]
+    inside = (idx >= 0) & (idx < len(values))
+    out = np.asarray(values, dtype="float64")[np.clip(idx, 0, len(values) - 1)]
+    out[~inside] = np.nan
+    return out
+
+
+def _cumsum_skipna(a, axis):
+    """Series.cumsum() semantics along `axis`: NaN stays NaN, later values keep summing."""
+    out = np.nancumsum(a, axis=axis)
+    out[np.isnan(a)] = np.nan
+    return out
+
+
+def market_model_fit(y, x, pos, est_window=(-250, -11), min_obs=60):
+    """
+    OLS y = alpha + beta * x over each event's estimation window, for every
+    (event, ticker) pair at once.
+
+    Window sums of x, y, x^2, xy and the observation count come from prefix
+    sums over the date axis (rows where y or x is NaN are left out per ticker),
+    so the fit is closed form with no loop over events or tickers.
+
+    :param y: (dates x tickers) stock returns
+    :param x: (dates,) market returns
+    :param pos: (events,) E0 row positions
+    :param est_window: inclusive (lo, hi) rel_day range, clipped to the data
+    :param min_obs: fewer observations than this gives NaN alpha/beta
+    :return: alpha, beta as (events x tickers) arrays
+    """
+    y = np.asarray(y, dtype="float64")
+    x = np.broadcast_to(np.asarray(x, dtype="float64")[:, None], y.shape)
+    ok = ~(np.isnan(y) | np.isnan(x))
+    xv, yv = np.where(ok, x, 0.), np.where(ok, y, 0.)
+
+    def prefix(a):
+        return np.vstack([np.zeros((1, a.shape[1])), np.cumsum(a, axis=0)])
+
+    lo = np.clip(pos + est_window[0], 0, len(y))
+    hi = np.clip(pos + est_window[1] + 1, 0, len(y))
+
+    def wsum(a):
+        p = prefix(a)
+        return p[hi] - p[lo]
+
+    n = wsum(ok.astype("float64"))
+    sx, sy, sxx, sxy = wsum(xv), wsum(yv), wsum(xv * xv), wsum(xv * yv)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        alpha = (sy - beta * sx) / n
+    bad = n < max(min_obs, 2)
+    return np.where(bad, np.nan, alpha), np.where(bad, np.nan, beta)
+
+
+def event_arrays(rets, tickers, mkt, dates, pre=6, post=6, model="market_adjusted",
+                 est_window=(-250, -11), min_obs=60):
+    """
+    Returns and abnormal returns around every event for every ticker.
+
+    :param rets: Date-indexed DataFrame of returns with `tickers` and `mkt` columns
+    :param model: 'market_adjusted' (AR = stock - market) or
+                  'market_model' (AR = stock - (alpha + beta * market), alpha/beta
+                  fitted per (event, ticker) over `est_window`, see market_model_fit)
+    :return: EventData with (events x rel_day x tickers) arrays ret, ar, car,
+             (events x rel_day) mkt_ret and (events x tickers) present
+             (the ticker has at least one AR in that window); alpha/beta are
+             (events x tickers) for the market model, None otherwise
+    """
+    if model not in AR_MODELS:
+        raise ValueError(f"unknown model {model!r}, expected one of {AR_MODELS}")
+    tickers = list(tickers)
+    pos, e0 = event_positions(rets.index, dates)
+    y = rets[tickers].to_numpy(dtype="float64")
+    x = rets[mkt].to_numpy(dtype="float64")
+    ret = gather_windows(y, pos, pre, post)
+    mkt_ret = gather_windows(x, pos, pre, post)
+
+    alpha = beta = None
+    if model == "market_model":
+        alpha, beta = market_model_fit(y, x, pos, est_window, min_obs)
+        ar = ret - (alpha[:, None, :] + beta[:, None, :] * mkt_ret[:, :, None])
+    else:
+        ar = ret - mkt_ret[:, :, None]
+    car = _cumsum_skipna(ar, axis=1)
+    present = ~np.isnan(ar).all(axis=1)
+    return EventData(e0, np.arange(-pre, post + 1), tickers, mkt, ret, mkt_ret, ar, car, present,
+                     alpha, beta)
+
+
+def window_sum(ev, lo, hi):
+    """Sum of AR over rel_day in [lo, hi] for each (event, ticker)."""
+    sel = (ev.rel_days >= lo) & (ev.rel_days <= hi)
+    return np.nansum(ev.ar[:, sel, :], axis=1)
+
+
+def ttest_window(ev, lo, hi):
+    """One-sample t-test of AR against 0 over rel_day in [lo, hi]: (tstat, pval) arrays."""
+    x = ev.ar[:, (ev.rel_days >= lo) & (ev.rel_days <= hi), :]
+    n = (~np.isnan(x)).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.nansum(x, axis=1) / n
+        sd = np.sqrt(np.nansum((x - mean[:, None, :]) ** 2, axis=1) / (n - 1))
+        tstat = mean / (sd / np.sqrt(n))
+    tstat = np.where(n > 1, tstat, np.nan)
+    pval = 2 * stats.t.sf(np.abs(tstat), np.maximum(n - 1, 1))
+    return tstat, np.where(np.isnan(tstat), np.nan, pval)
+
+
+def _label(lo, hi):
+    return f"{lo:+d}_to_{hi:+d}".lstrip("+")
+
+
+def results_table(ev, car_windows=((-1, 1), (-3, 3), (-5, 5)), test_window=(-1, 1)):
+    """Per (ticker, event) rows, same columns as the original event_study() table."""
+    n_ev, n_t = len(ev.event_dates), len(ev.tickers)
+    e0_col = int(np.flatnonzero(ev.rel_days == 0)[0])
+    mkt_e0 = ev.mkt_ret[:, e0_col]
+    tstat, pval = ttest_window(ev, *test_window)
+
+    cols = {
+        "ticker": np.tile(ev.tickers, n_ev),
+        "event_date": np.repeat([d.date() for d in ev.event_dates], n_t),
+        "mkt_event_ret": np.repeat(mkt_e0, n_t),
+        "AR_E0": ev.ar[:, e0_col, :].ravel(),
+    }
+    for lo, hi in car_windows:
+        cols[f"CAR_{_label(lo, hi)}"] = window_sum(ev, lo, hi).ravel()
+    cols[f"AR_tstat_{_label(*test_window)}"] = tstat.ravel()
+    cols[f"AR_pval_{_label(*test_window)}"] = pval.ravel()
+    cols["signal"] = np.repeat(np.sign(mkt_e0), n_t)  # +1 dovish (stocks up), -1 hawkish
+    if ev.beta is not None:
+        cols["alpha"], cols["beta"] = ev.alpha.ravel(), ev.beta.ravel()
+
+    out = pd.DataFrame(cols)[ev.present.ravel()]
+    return out.sort_values(["ticker", "event_date"], kind="stable").reset_index(drop=True)
+
+
+def signal_betas(ev):
+    """Per ticker: cov(AR_E0, signal) / var(signal) across events (population moments)."""
+    e0_col = int(np.flatnonzero(ev.rel_days == 0)[0])
+    x = ev.ar[:, e0_col, :]
+    y = np.broadcast_to(np.sign(ev.mkt_ret[:, e0_col])[:, None], x.shape)
+    p = ev.present
+    n = p.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx = (x * p).sum(axis=0) / n
+        my = (y * p).sum(axis=0) / n
+        cov = (((x - mx) * (y - my)) * p).sum(axis=0) / n
+        var = (((y - my) ** 2) * p).sum(axis=0) / n
+        beta = np.where((np.abs(y) * p).sum(axis=0) == 0, np.nan, cov / var)
+    beta = pd.DataFrame({"ticker": ev.tickers, "beta_to_signal": beta})[n > 0]
+    return beta.sort_values("ticker", kind="stable").reset_index(drop=True)
+
+
+def mean_curves(ev, field="car"):
+    """
+    Mean over events of `field` ('car', 'ar' or 'ret') by rel_day, as a
+    rel_day x tickers DataFrame (rel_days no event covers are left out).
+    """
+    a = getattr(ev, field)
+    count = (~np.isnan(a)).sum(axis=0)
+    with np.errstate(invalid="ignore"):
+        mean = np.where(count > 0, np.nansum(a, axis=0) / np.maximum(count, 1), np.nan)
+    df = pd.DataFrame(mean, index=pd.Index(ev.rel_days, name="rel_day"), columns=ev.tickers)
+    return df.dropna(how="all")
+
+
+def event_study(rets, tickers, mkt, dates, pre=6, post=6, **model_kwargs):
+    """
+    Event study over every (event, ticker) pair in one pass.
+    `model_kwargs` (model, est_window, min_obs) go to event_arrays.
+
+    :return: (results DataFrame, signal beta DataFrame, {ticker: mean CAR Series by rel_day})
+    """
+    ev = event_arrays(rets, tickers, mkt, dates, pre, post, **model_kwargs)
+    curves = mean_curves(ev)
+    return (results_table(ev), signal_betas(ev),
+            {t: curves[t].dropna() for t in ev.tickers if ev.present[:, ev.tickers.index(t)].any()})
+
+
+def aggregate_event_panel(rets, tickers, mkt, dates, pre=5, post=5, **model_kwargs):
+    """
+    Mean raw return, AR and CAR by rel_day across events, for every ticker.
+    Returns {ticker: DataFrame(index=rel_day, columns=[ticker, 'AR', 'CAR'])}.
+    """
+    ev = event_arrays(rets, tickers, mkt, dates, pre, post, **model_kwargs)
+    raw, ar, car = mean_curves(ev, "ret"), mean_curves(ev, "ar"), mean_curves(ev, "car")
+    out = {}
+    for t in ev.tickers:
+        df = pd.DataFrame({t: raw[t], "AR": ar[t], "CAR": car[t]}).dropna(how="all")
+        if len(df):
+            out[t] = df
+    return out
+
+
+def aggregate_event_windows(rets, ticker, mkt, dates, pre=5, post=5, **model_kwargs):
+    """
+    Aggregate returns across multiple event dates for one ticker.
+    Returns dataframe with mean raw, AR, CAR by rel_day (None if no event has data).
+    """
+    return aggregate_event_panel(rets, [ticker], mkt, dates, pre, post, **model_kwargs).get(ticker)
+
+
+if __name__ == "__main__":
+    pass
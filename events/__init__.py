@@ -0,0 +1,6 @@
+# events/__init__.py
+
+from .EventStudy import *
+from .EventInference import *
+from .EventCalendar import *
+from .EventPlots import *
@@ -0,0 +1,473 @@
+import os
+import json
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from signals.MomentumSignal import momentum_signals
+
+# Streaming versions of calcKD / bollinger_bands / MACD / calcRSI.
+#
+# Each *State object holds exactly what its batch function carries from one row
+# to the next (EMA accumulators, rolling windows, min/max deques), so feeding it one
+# new bar costs O(window) at most, independent of the history length.
+# Every state serializes with to_dict()/from_dict(); TickerSignalState bundles
+# the daily pipeline (KD -> dropna -> Bollinger -> RSI -> momentum) and is
+# persisted per ticker and parameter set under indicator_state_path (resolved
+# on first use, so importing this module doesn't pull in the utils package).
+
+STATE_VERSION = 1
+
+
+class _EWM:
+    """One column of pandas .ewm(alpha=..., adjust=False, min_periods=...).mean()."""
+
+    def __init__(self, alpha, min_periods=0):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.weighted = None
+        self.nobs = 0
+
+    def update(self, x):
+        if not math.isnan(x):
+            self.nobs += 1
+            if self.weighted is None:
+                self.weighted = x
+            elif self.weighted != x:
+                # same arithmetic as pandas' ewm kernel with adjust=False
+                old_wt = 1. - self.alpha
+                self.weighted = (old_wt * self.weighted + self.alpha * x) / (old_wt + self.alpha)
+        if self.weighted is None or self.nobs < max(self.min_periods, 1):
+            return np.nan
+        return self.weighted
+
+    def to_dict(self):
+        return {"alpha": self.alpha, "min_periods": self.min_periods,
+                "weighted": self.weighted, "nobs": self.nobs}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["alpha"], d["min_periods"])
+        s.weighted, s.nobs = d["weighted"], d["nobs"]
+        return s
+
+
+class _RollingWindow:
+    """
+    Mean / sample std over the last `window` values, NaN-aware like pandas
+    .rolling(window) (NaN rows don't count towards min_periods=window).
+    Both are recomputed from the buffer with math.fsum on every call rather
+    than kept as running sums, and a window of identical values gives exactly
+    that value (std 0) as pandas does, so exact ties such as %K == %D == 100
+    compare the same way as in calcKD.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+
+    def update(self, x):
+        self.values.append(x)
+
+    def _full(self):
+        """The buffered values if all `window` of them are present, else None."""
+        if len(self.values) < self.window or any(math.isnan(v) for v in self.values):
+            return None
+        return list(self.values)
+
+    def mean(self):
+        vals = self._full()
+        if vals is None:
+            return np.nan
+        if all(v == vals[0] for v in vals):
+            return vals[0]
+        return math.fsum(vals) / len(vals)
+
+    def std(self):
+        """Sample standard deviation (ddof=1), like Series.rolling().std()."""
+        vals = self._full()
+        if vals is None or len(vals) < 2:
+            return np.nan
+        if all(v == vals[0] for v in vals):
+            return 0.
+        mean = math.fsum(vals) / len(vals)
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in vals) / (len(vals) - 1))
+
+    def to_dict(self):
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["window"])
+        s.values.extend(_nan(v) for v in d["values"])
+        return s
+
+
+class _RollingExtreme:
+    """Rolling min (or max) over `window` bars with a monotonic deque of (bar index, value)."""
+
+    def __init__(self, window, mode="min"):
+        self.window = window
+        self.mode = mode
+        self.items = deque()
+        self.count = 0       # bars seen
+        self.nan_at = -1     # index of the latest NaN bar
+
+    def update(self, x):
+        i = self.count
+        self.count += 1
+        if math.isnan(x):
+            self.nan_at = i
+        else:
+            worse = (lambda v: v >= x) if self.mode == "min" else (lambda v: v <= x)
+            while self.items and worse(self.items[-1][1]):
+                self.items.pop()
+            self.items.append((i, x))
+        while self.items and self.items[0][0] <= i - self.window:
+            self.items.popleft()
+        if self.count < self.window or self.nan_at > i - self.window:
+            return np.nan
+        return self.items[0][1]
+
+    def to_dict(self):
+        return {"window": self.window, "mode": self.mode, "items": [list(p) for p in self.items],
+                "count": self.count, "nan_at": self.nan_at}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["window"], d["mode"])
+        s.items.extend(tuple(p) for p in d["items"])
+        s.count, s.nan_at = d["count"], d["nan_at"]
+        return s
+
+
+def _nan(x):
+    return np.nan if x is None else x
+
+
+def _plain(row):
+    """Row dict/Series -> JSON-friendly dict (numpy scalars unwrapped, dates as ISO strings)."""
+    out = {}
+    for k, v in dict(row).items():
+        if isinstance(v, pd.Timestamp):
+            v = v.isoformat()
+        elif isinstance(v, np.generic):
+            v = v.item()
+        out[k] = v
+    return out
+
+
+def _unplain(d):
+    row = {k: _nan(v) for k, v in d.items()}
+    row["Date"] = pd.Timestamp(row["Date"])
+    return row
+
+
+class RSIState:
+    """Incremental calcRSI (Wilder smoothing, alpha=1/period)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = _EWM(1 / period, period)
+        self.avg_loss = _EWM(1 / period, period)
+
+    def update(self, close):
+        delta = np.nan if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        gain = delta if math.isnan(delta) else max(delta, 0.)
+        loss = delta if math.isnan(delta) else -min(delta, 0.)
+        ag = self.avg_gain.update(gain)
+        al = self.avg_loss.update(loss)
+        rs = ag / al if al != 0 else np.nan
+        rsi = 100 - (100 / (1 + rs))
+        return 50. if math.isnan(rsi) else rsi
+
+    def to_dict(self):
+        return {"period": self.period, "prev_close": self.prev_close,
+                "avg_gain": self.avg_gain.to_dict(), "avg_loss": self.avg_loss.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["period"])
+        s.prev_close = d["prev_close"]
+        s.avg_gain = _EWM.from_dict(d["avg_gain"])
+        s.avg_loss = _EWM.from_dict(d["avg_loss"])
+        return s
+
+
+class MACDState:
+    """Incremental MACD: returns (macd, macd_signal, MACD_Diff)."""
+
+    def __init__(self, span_long=26, span_short=12, span_signal=9):
+        self.spans = (span_long, span_short, span_signal)
+        self.ema_long = _EWM(2 / (span_long + 1))
+        self.ema_short = _EWM(2 / (span_short + 1))
+        self.ema_signal = _EWM(2 / (span_signal + 1))
+
+    def update(self, close):
+        macd = self.ema_short.update(close) - self.ema_long.update(close)
+        signal = self.ema_signal.update(macd)
+        return macd, signal, macd - signal
+
+    def to_dict(self):
+        return {"spans": list(self.spans), "ema_long": self.ema_long.to_dict(),
+                "ema_short": self.ema_short.to_dict(), "ema_signal": self.ema_signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(*d["spans"])
+        s.ema_long = _EWM.from_dict(d["ema_long"])
+        s.ema_short = _EWM.from_dict(d["ema_short"])
+        s.ema_signal = _EWM.from_dict(d["ema_signal"])
+        return s
+
+
+class BollingerState:
+    """Incremental bollinger_bands: returns the five columns it adds, as a dict."""
+
+    def __init__(self, window=20, no_of_std=2):
+        self.no_of_std = no_of_std
+        self.close = _RollingWindow(window)
+        self.prev = None    # (close, lower_band, upper_band) of the previous bar
+
+    def update(self, close):
+        self.close.update(close)
+        mean, std = self.close.mean(), self.close.std()
+        upper = mean + (std * self.no_of_std)
+        lower = mean - (std * self.no_of_std)
+        prev_close, prev_lower, prev_upper = (np.nan,) * 3 if self.prev is None else self.prev
+        self.prev = (close, lower, upper)
+        return {
+            "middle_band": mean,
+            "upper_band": upper,
+            "lower_band": lower,
+            "BB_Buy_Signal": 1 if (prev_close < prev_lower) and (close > lower) else 0,
+            "BB_Sell_Signal": -1 if (prev_close > prev_upper) and (close < upper) else 0,
+        }
+
+    def to_dict(self):
+        return {"no_of_std": self.no_of_std, "close": self.close.to_dict(),
+                "prev": None if self.prev is None else list(self.prev)}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["close"]["window"], d["no_of_std"])
+        s.close = _RollingWindow.from_dict(d["close"])
+        s.prev = None if d["prev"] is None else tuple(_nan(v) for v in d["prev"])
+        return s
+
+
+class KDState:
+    """Incremental calcKD: returns (%K, %D)."""
+
+    def __init__(self, window=3, k_period=3, d_period=3):
+        self.low = _RollingExtreme(window, "min")
+        self.high = _RollingExtreme(window, "max")
+        self.k = _RollingWindow(k_period)
+        self.d = _RollingWindow(d_period)
+
+    def update(self, high, low, close):
+        rolling_min = self.low.update(low)
+        rolling_max = self.high.update(high)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            raw = np.float64(close - rolling_min) / np.float64(rolling_max - rolling_min) * 100
+        self.k.update(float(raw))
+        k = self.k.mean()
+        self.d.update(k)
+        return k, self.d.mean()
+
+    def to_dict(self):
+        return {"low": self.low.to_dict(), "high": self.high.to_dict(),
+                "k": self.k.to_dict(), "d": self.d.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["low"]["window"], d["k"]["window"], d["d"]["window"])
+        s.low = _RollingExtreme.from_dict(d["low"])
+        s.high = _RollingExtreme.from_dict(d["high"])
+        s.k = _RollingWindow.from_dict(d["k"])
+        s.d = _RollingWindow.from_dict(d["d"])
+        return s
+
+
+DEFAULT_PARAMS = {"kd": [3, 3, 3], "bb": [20, 2], "rsi": 14, "macd": None}
+
+
+def params_key(params):
+    """Stable string key for a parameter set, e.g. 'kd=3,3,3|bb=20,2|rsi=14|macd=None'."""
+    def fmt(v):
+        return ",".join(str(x) for x in v) if isinstance(v, (list, tuple)) else str(v)
+    return "|".join(f"{k}={fmt(params[k])}" for k in sorted(params))
+
+
+class TickerSignalState:
+    """
+    The MomentumSignalDaily pipeline as a stream:
+
+        calcKD -> dropna -> bollinger_bands -> (MACD) -> calcRSI -> momentum_signals
+
+    Bars reach the Bollinger/RSI stages only once %K and %D exist, exactly like
+    the batch dropna(). update() returns the row momentum_data.iloc[-1] would
+    hold for that bar, or None while KD is still warming up; update_frame()
+    runs momentum_signals once, for the last bar only.
+    """
+
+    def __init__(self, params=None):
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        p = self.params
+        self.kd = KDState(*p["kd"])
+        self.bb = BollingerState(*p["bb"])
+        self.rsi = RSIState(p["rsi"])
+        self.macd = MACDState(*p["macd"]) if p["macd"] else None
+        self.last_date = None
+        self.last_close = None
+        self.rows = []          # last two rows fed to momentum_signals
+        self.last_row = None    # momentum_signals output for rows[-1]
+
+    def update(self, date, open_, high, low, close, volume, emit=True):
+        date = pd.Timestamp(date)
+        chg = np.nan if self.last_close is None else close - self.last_close
+        self.last_date, self.last_close = date, close
+
+        k, d = self.kd.update(high, low, close)
+        row = {"Date": date, "Close": close, "High": high, "Low": low, "Open": open_,
+               "Volume": volume, "chg": chg, "%K": k, "%D": d}
+        if any(pd.isna(v) for v in row.values()):
+            return None     # dropped by the pipeline's dropna()
+
+        row.update(self.bb.update(close))
+        if self.macd is not None:
+            row["macd"], row["macd_signal"], row["MACD_Diff"] = self.macd.update(close)
+        row["RSI"] = self.rsi.update(close)
+
+        self.rows = self.rows[-1:] + [row]
+        if emit:
+            self._emit()
+        return self.last_row if emit else row
+
+    def _emit(self):
+        # momentum_signals only looks one row back
+        self.last_row = momentum_signals(pd.DataFrame(self.rows)).iloc[-1]
+
+    def update_frame(self, df):
+        """Feed every row of a Date/Open/High/Low/Close/Volume frame; returns last_row."""
+        cols = [df[c].to_numpy() for c in ("Date", "Open", "High", "Low", "Close", "Volume")]
+        emitted = False
+        for date, o, h, l, c, v in zip(*cols):
+            if self.update(date, float(o), float(h), float(l), float(c), float(v), emit=False) is not None:
+                emitted = True
+        if emitted:
+            self._emit()
+        return self.last_row
+
+    @classmethod
+    def from_history(cls, df, params=None):
+        """Rebuild the state by replaying a ticker's full history."""
+        s = cls(params)
+        s.update_frame(df)
+        return s
+
+    def to_dict(self):
+        return {
+            "version": STATE_VERSION,
+            "params": self.params,
+            "last_date": None if self.last_date is None else self.last_date.isoformat(),
+            "last_close": self.last_close,
+            "kd": self.kd.to_dict(),
+            "bb": self.bb.to_dict(),
+            "rsi": self.rsi.to_dict(),
+            "macd": None if self.macd is None else self.macd.to_dict(),
+            "rows": [_plain(r) for r in self.rows],
+            "last_row": None if self.last_row is None else _plain(self.last_row),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get("version") != STATE_VERSION:
+            raise ValueError(f"unsupported state version {d.get('version')}")
+        s = cls(d["params"])
+        s.last_date = None if d["last_date"] is None else pd.Timestamp(d["last_date"])
+        s.last_close = d["last_close"]
+        s.kd = KDState.from_dict(d["kd"])
+        s.bb = BollingerState.from_dict(d["bb"])
+        s.rsi = RSIState.from_dict(d["rsi"])
+        s.macd = None if d["macd"] is None else MACDState.from_dict(d["macd"])
+        s.rows = [_unplain(r) for r in d["rows"]]
+        if d["last_row"] is not None:
+            s.last_row = pd.Series(_unplain(d["last_row"]))
+        return s
+
+
+def _state_dir(state_dir):
+    if state_dir is None:
+        from utils.corepath import indicator_state_path
+        state_dir = indicator_state_path
+    return state_dir
+
+
+def _state_file(ticker, state_dir):
+    return os.path.join(_state_dir(state_dir), f"{ticker}.json")
+
+
+def load_state(ticker, params=None, state_dir=None):
+    """Saved TickerSignalState for (ticker, params), or None."""
+    path = _state_file(ticker, state_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        d = saved.get(params_key(dict(DEFAULT_PARAMS, **(params or {}))))
+        return None if d is None else TickerSignalState.from_dict(d)
+    except Exception as e:
+        print(f"[WARN] {ticker}: unreadable indicator state ({e})")
+        return None
+
+
+def save_state(ticker, state, state_dir=None):
+    """Store `state` next to the ticker's states for other parameter sets."""
+    state_dir = _state_dir(state_dir)
+    os.makedirs(state_dir, exist_ok=True)
+    path = _state_file(ticker, state_dir)
+    saved = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except Exception:
+            saved = {}
+    saved[params_key(state.params)] = state.to_dict()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    os.replace(tmp_path, path)
+
+
+def update_ticker_state(ticker, data, params=None, state_dir=None):
+    """
+    Bring the saved state for `ticker` up to date with `data` (Date/OHLCV frame,
+    oldest first) and return (last momentum row or None, state).
+
+    Only bars after the saved last_date are processed. The state is rebuilt from
+    the full history when there is none, when it is unreadable, or when the saved
+    last bar is no longer in `data` with the same Close (history was revised).
+    States live under `state_dir` (default: indicator_state_path).
+    """
+    state = load_state(ticker, params, state_dir)
+    if state is not None and state.last_date is not None:
+        at = data.loc[data["Date"] == state.last_date, "Close"]
+        if len(at) == 1 and at.iloc[0] == state.last_close:
+            state.update_frame(data[data["Date"] > state.last_date])
+        else:
+            print(f"[WARN] {ticker}: history changed since {state.last_date.date()}, rebuilding state")
+            state = None
+    if state is None:
+        state = TickerSignalState.from_history(data, params)
+    save_state(ticker, state, state_dir)
+    return state.last_row, state
+
+
+if __name__ == "__main__":
+    pass
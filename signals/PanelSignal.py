@@ -0,0 +1,294 @@
+import numpy as np
+import pandas as pd
+
+# Cross-sectional version of the daily pipeline
+#
+#   calcKD -> dropna -> bollinger_bands -> calcRSI -> momentum_signals
+#
+# computed for every ticker at once on (rows x tickers) arrays.
+#
+# Tickers have different histories and gaps on the shared date axis, and the
+# per-ticker pipeline drops rows (dropna after calcKD) before the later stages.
+# To reproduce it exactly, each stage runs on a "compacted" array: every
+# column's kept rows are stacked at the bottom in date order, with NaN padding
+# above. Rolling/EWM windows and shift(1) then see the same neighbours as in the
+# per-ticker frames, and the last row holds each ticker's latest value.
+
+STRING_COLUMNS = ["MA_Signal", "Solid_Buy", "Solid_Sell", "Overbought", "Oversold",
+                  "Divergence", "RSI_State", "Composite_Signal"]
+
+DEFAULT_WEIGHTS = {
+    'kd': 1.0,        # KD Buy/Sell
+    'kd_solid': 0.5,  # Solid_Buy/Sell bonus
+    'rsi': 1.0,       # RSI Buy/Sell
+    'rsi_mid': 0.5,   # RSI midline crosses
+    'bb': 1.0,        # Bollinger Buy/Sell
+    'macd': 1.0       # MACD crossovers
+}
+
+
+def _compact(mask):
+    """
+    Stack each column's True rows at the bottom, keeping their order.
+    Returns (order, valid): order[i, j] is the source row of slot i in column j,
+    valid[i, j] is False for padding slots. Rows that are padding in every
+    column are trimmed off the top.
+    """
+    order = np.argsort(mask, axis=0, kind="stable")
+    valid = np.take_along_axis(mask, order, axis=0)
+    any_valid = valid.any(axis=1)
+    top = int(np.argmax(any_valid)) if any_valid.any() else len(any_valid)
+    return order[top:], valid[top:]
+
+
+def _gather(arr, order, valid):
+    out = np.take_along_axis(np.asarray(arr, dtype="float64"), order, axis=0)
+    out[~valid] = np.nan
+    return out
+
+
+def _shift(a):
+    out = np.empty_like(a)
+    out[:1] = np.nan
+    out[1:] = a[:-1]
+    return out
+
+
+def _frame(a):
+    return pd.DataFrame(a, copy=False)
+
+
+class PanelStage:
+    """
+    Compacted arrays for one stage of the pipeline.
+
+    :param cols: {column: (rows x tickers) array}, padding slots are NaN
+    :param src: (rows x tickers) row index into the panel's date axis
+    :param valid: (rows x tickers) False for padding slots
+    """
+
+    def __init__(self, cols, src, valid):
+        self.cols = cols
+        self.src = src
+        self.valid = valid
+
+    def subset(self, keep):
+        """Re-compact to the rows where `keep` (same shape) is True, like DataFrame.dropna."""
+        order, valid = _compact(keep & self.valid)
+        cols = {}
+        for c, a in self.cols.items():
+            g = np.take_along_axis(a, order, axis=0)
+            if g.dtype.kind == "f":
+                g = g.copy()
+                g[~valid] = np.nan
+            cols[c] = g
+        return PanelStage(cols, np.take_along_axis(self.src, order, axis=0), valid)
+
+
+def panel_base(panel):
+    """Stage 0: each ticker's bars (rows where Close exists), plus chg = Close.diff()."""
+    mask = ~np.isnan(panel["Close"])
+    order, valid = _compact(mask)
+    cols = {f: _gather(panel[f], order, valid) for f in ("Close", "High", "Low", "Open", "Volume")
+            if f in panel.fields}
+    cols["chg"] = cols["Close"] - _shift(cols["Close"])
+    return PanelStage(cols, order, valid)
+
+
+def panel_kd(stage, window=3, k_period=3, d_period=3):
+    """calcKD on every column, then the pipeline's dropna(). Returns the next stage."""
+    low, high, close = _frame(stage.cols["Low"]), _frame(stage.cols["High"]), stage.cols["Close"]
+    rolling_min = low.rolling(window=window).min().to_numpy()
+    rolling_max = high.rolling(window=window).max().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (close - rolling_min) / (rolling_max - rolling_min) * 100
+    k = _frame(k).rolling(window=k_period).mean()
+    d = k.rolling(window=d_period).mean()
+
+    cols = dict(stage.cols)
+    cols["%K"] = k.to_numpy()
+    cols["%D"] = d.to_numpy()
+    keep = np.logical_and.reduce([~np.isnan(a) for a in cols.values()])
+    return PanelStage(cols, stage.src, stage.valid).subset(keep)
+
+
+def panel_bollinger(stage, window=20, no_of_std=2):
+    """bollinger_bands columns for every ticker: {column: array}."""
+    close = stage.cols["Close"]
+    c = _frame(close).rolling(window)
+    rolling_mean = c.mean().to_numpy()
+    rolling_std = c.std().to_numpy()
+    upper = rolling_mean + (rolling_std * no_of_std)
+    lower = rolling_mean - (rolling_std * no_of_std)
+    prev_close = _shift(close)
+    return {
+        "middle_band": rolling_mean,
+        "upper_band": upper,
+        "lower_band": lower,
+        "BB_Buy_Signal": np.where((prev_close < _shift(lower)) & (close > lower), 1, 0),
+        "BB_Sell_Signal": np.where((prev_close > _shift(upper)) & (close < upper), -1, 0),
+    }
+
+
+def panel_rsi(stage, period=14):
+    """calcRSI (Wilder) for every ticker; padding slots stay NaN."""
+    delta = _frame(stage.cols["Close"]).diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    avg_gain = gain.ewm(alpha=1/period, adjust=False, min_periods=period).mean()
+    avg_loss = loss.ewm(alpha=1/period, adjust=False, min_periods=period).mean()
+    rs = avg_gain / (avg_loss.replace(0, np.nan))
+    rsi = (100 - (100 / (1 + rs))).fillna(50).to_numpy(copy=True)
+    rsi[~stage.valid] = np.nan
+    return rsi
+
+
+def panel_macd(stage, span_long=26, span_short=12, span_signal=9):
+    """MACD columns for every ticker: {column: array}."""
+    close = _frame(stage.cols["Close"])
+    macd = close.ewm(span=span_short, adjust=False).mean() \
+         - close.ewm(span=span_long, adjust=False).mean()
+    macd_signal = macd.ewm(span=span_signal, adjust=False).mean()
+    return {"macd": macd.to_numpy(), "macd_signal": macd_signal.to_numpy(),
+            "MACD_Diff": (macd - macd_signal).to_numpy()}
+
+
+def panel_momentum(cols, weights=None, rsi_overbought=70, rsi_oversold=30, rsi_midline=50,
+                   buy_threshold=2.0, sell_threshold=-2.0):
+    """
+    momentum_signals on compacted arrays. `cols` must hold Close, %K, %D and may
+    hold RSI, BB_Buy/Sell_Signal, MACD_Signal or macd/macd_signal.
+    Returns {column: array} with the columns momentum_signals adds.
+    """
+    k, d, close = cols["%K"], cols["%D"], cols["Close"]
+    k1, d1, close1 = _shift(k), _shift(d), _shift(close)
+    out = {}
+
+    # 1) K/D signals
+    out['MA_Signal'] = np.where((k > d) & (k1 <= d1), 'Buy',
+                       np.where((k < d) & (k1 >= d1), 'Sell', np.nan))
+    out['Overbought'] = np.where((k > 80) & (d > 80), 'Overbought', np.nan)
+    out['Oversold'] = np.where((k < 20) & (d < 20), 'Oversold', np.nan)
+    out['Solid_Buy'] = np.where((out['MA_Signal'] == 'Buy') & (k < 20) & (d < 20), 'Solid Buy', np.nan)
+    out['Solid_Sell'] = np.where((out['MA_Signal'] == 'Sell') & (k > 80) & (d > 80), 'Solid Sell', np.nan)
+    out['Divergence'] = np.where((close > close1) & (k < k1) & (d < d1), 'Bearish Divergence',
+                        np.where((close < close1) & (k > k1) & (d > d1), 'Bullish Divergence', np.nan))
+
+    # 2) RSI signals
+    if 'RSI' in cols:
+        r = cols['RSI']
+        r1 = _shift(r)
+        out['RSI_State'] = np.where(r > rsi_overbought, 'Overbought',
+                           np.where(r < rsi_oversold, 'Oversold', np.nan))
+        out['RSI_Buy_Signal'] = np.where((r1 <= rsi_oversold) & (r > rsi_oversold), 1, 0)
+        out['RSI_Sell_Signal'] = np.where((r1 >= rsi_overbought) & (r < rsi_overbought), -1, 0)
+        out['RSI_Mid_Cross_Up'] = np.where((r1 <= rsi_midline) & (r > rsi_midline), 1, 0)
+        out['RSI_Mid_Cross_Down'] = np.where((r1 >= rsi_midline) & (r < rsi_midline), -1, 0)
+
+    # 3) Component scores (same operation order as momentum_signals)
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+    zeros = np.zeros(k.shape)
+
+    kd_score = zeros.copy()
+    kd_score += weights['kd'] * np.where(out['MA_Signal'] == 'Buy', 1,
+                                np.where(out['MA_Signal'] == 'Sell', -1, 0)).astype(float)
+    kd_score += weights['kd_solid'] * (~pd.isna(out['Solid_Buy'])).astype(float)
+    kd_score -= weights['kd_solid'] * (~pd.isna(out['Solid_Sell'])).astype(float)
+    out['KD_Score'] = np.nan_to_num(kd_score, nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+    rsi_score = zeros.copy()
+    if 'RSI_Buy_Signal' in out:
+        rsi_score += weights['rsi'] * out['RSI_Buy_Signal'].astype(float)
+        rsi_score += weights['rsi'] * out['RSI_Sell_Signal'].astype(float)
+        rsi_score += weights['rsi_mid'] * out['RSI_Mid_Cross_Up'].astype(float)
+        rsi_score += weights['rsi_mid'] * out['RSI_Mid_Cross_Down'].astype(float)
+    out['RSI_Score'] = rsi_score
+
+    bb_score = zeros.copy()
+    if 'BB_Buy_Signal' in cols:
+        bb_score += weights['bb'] * cols['BB_Buy_Signal'].astype(float)
+    if 'BB_Sell_Signal' in cols:
+        bb_score += weights['bb'] * cols['BB_Sell_Signal'].astype(float)
+    out['BB_Score'] = bb_score
+
+    macd_score = zeros.copy()
+    if 'MACD_Signal' in cols:
+        macd_score += weights['macd'] * cols['MACD_Signal'].astype(float)
+    elif 'macd' in cols and 'macd_signal' in cols:
+        m, s = cols['macd'], cols['macd_signal']
+        m1, s1 = _shift(m), _shift(s)
+        macd_up = ((m > s) & (m1 <= s1)).astype(int)
+        macd_down = -((m < s) & (m1 >= s1)).astype(int)
+        macd_score += weights['macd'] * (macd_up + macd_down).astype(float)
+    out['MACD_Score'] = np.where(np.isnan(macd_score), 0.0, macd_score)
+
+    # 4) Composite score & signal
+    out['Composite_Score'] = (out['KD_Score'] + out['RSI_Score'] +
+                              out['BB_Score'] + out['MACD_Score'])
+    out['Composite_Signal'] = np.where(out['Composite_Score'] >= buy_threshold, 'Buy',
+                              np.where(out['Composite_Score'] <= sell_threshold, 'Sell', 'Neutral'))
+    out['Score'] = out['Composite_Score']
+    return out
+
+
+class SignalPanel:
+    """
+    Output of panel_signals. Holds every column of the per-ticker momentum_data
+    frames in compacted form; frame() lays one out as dates x tickers and
+    last_row() gives what momentum_data.iloc[-1] was.
+    """
+
+    def __init__(self, dates, tickers, stage):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.stage = stage
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+
+    @property
+    def columns(self):
+        return list(self.stage.cols)
+
+    def frame(self, column):
+        """dates x tickers DataFrame of `column` (NaN where the ticker has no row)."""
+        a = self.stage.cols[column]
+        dtype = "float64" if a.dtype.kind in "fiub" else object
+        out = np.full((len(self.dates), len(self.tickers)), np.nan, dtype=dtype)
+        rows, cols = np.nonzero(self.stage.valid)
+        out[self.stage.src[rows, cols], cols] = a[rows, cols]
+        return pd.DataFrame(out, index=self.dates, columns=self.tickers)
+
+    def last_row(self, ticker):
+        """Latest row for `ticker` as a Series, or None if it has no rows after dropna."""
+        j = self._pos[ticker]
+        if not len(self.stage.valid) or not self.stage.valid[-1, j]:
+            return None
+        row = {"Date": self.dates[self.stage.src[-1, j]]}
+        row.update({c: a[-1, j] for c, a in self.stage.cols.items()})
+        return pd.Series(row, name=self.stage.src[-1, j])
+
+    def last_rows(self):
+        return {t: r for t in self.tickers if (r := self.last_row(t)) is not None}
+
+
+def panel_signals(panel, kd_window=3, k_period=3, d_period=3, bb_window=20, no_of_std=2,
+                  rsi_period=14, macd=False, macd_spans=(26, 12, 9), **momentum_kwargs):
+    """
+    Run the daily signal pipeline for every ticker of a PricePanel in one pass.
+
+    Matches, per ticker:
+        kd = calcKD(df, window=kd_window, k_period=k_period, d_period=d_period).dropna()
+        bb = bollinger_bands(kd, bb_window, no_of_std)
+        (MACD(bb, *macd_spans) if macd=True)
+        rsi = calcRSI(bb, period=rsi_period)
+        momentum_signals(rsi, **momentum_kwargs)
+
+    :return: SignalPanel
+    """
+    stage = panel_kd(panel_base(panel), kd_window, k_period, d_period)
+    stage.cols.update(panel_bollinger(stage, bb_window, no_of_std))
+    if macd:
+        stage.cols.update(panel_macd(stage, *macd_spans))
+    stage.cols["RSI"] = panel_rsi(stage, rsi_period)
+    stage.cols.update(panel_momentum(stage.cols, **momentum_kwargs))
+    return SignalPanel(panel.dates, panel.tickers, stage)
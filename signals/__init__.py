@@ -3,4 +3,5 @@
 from .KlineSignal import *
 from .MomentumSignal import *
 from .RsiSignal import *
-from .VolumeSignal import *
\ No newline at end of file
+from .VolumeSignal import *
+from .PanelSignal import *
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import time
+import types
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+# utils/credential.py holds private API keys and is not in the repo, and
+# utils/__init__ star-imports every helper (mail, plots, credentials). Load
+# utils.Chatgpt against a dummy key instead, so nothing real is ever sent.
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if "utils" not in sys.modules:
+    _utils = types.ModuleType("utils")
+    _utils.__path__ = [os.path.join(_ROOT, "utils")]
+    sys.modules["utils"] = _utils
+_cred = types.ModuleType("utils.credential")
+_cred.GPT_Key = _cred.API_KEY = "test-key"
+sys.modules.setdefault("utils.credential", _cred)
+
+import utils.Chatgpt as cg
+from utils.SentimentCache import SentimentCache
+
+
+class StandIn:
+    """Local chat-completions endpoint: replies from `script`, then from `reply(prompt)`."""
+
+    def __init__(self):
+        self.script = []            # [(status, headers)] served first, one per request
+        self.reply = lambda prompt: "neutral, 5"
+        self.delay = 0.
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def handle(self, body):
+        with self.lock:
+            self.prompts.append(body["messages"][0]["content"])
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            step = self.script.pop(0) if self.script else None
+        try:
+            if callable(self.delay):
+                time.sleep(self.delay(body))
+            else:
+                time.sleep(self.delay)
+            if step is not None:
+                return step[0], step[1], b"{}"
+            content = self.reply(body["messages"][0]["content"])
+            return 200, {}, json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def server(monkeypatch):
+    stand_in = StandIn()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            status, headers, out = stand_in.handle(body)
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setattr(cg, "CHAT_URL", f"http://127.0.0.1:{httpd.server_address[1]}/v1/chat/completions")
+    yield stand_in
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fast():
+    return cg.TokenBucket(rate=1000, capacity=1000)
+
+
+def _score_reply(prompt):
+    """'positive, <n>' where n comes from the text 't<i>' at the end of the prompt."""
+    i = int(prompt.rsplit(" t", 1)[1])
+    return f"positive, {i % 10 + 1}"
+
+
+def test_retries_429_honouring_retry_after(server):
+    server.script = [(429, {"Retry-After": "0.3"}), (503, {})]
+    t0 = time.monotonic()
+    reply = cg.post_chat({"model": "m", "messages": [{"role": "user", "content": "x"}]},
+                         limiter=fast(), backoff=0.01)
+    assert reply["choices"][0]["message"]["content"] == "neutral, 5"
+    assert len(server.prompts) == 3
+    assert time.monotonic() - t0 >= 0.3
+
+
+def test_gives_up_after_retries_and_on_client_errors(server):
+    server.script = [(500, {})] * 3
+    assert cg.post_chat({"messages": [{"content": "x"}]}, limiter=fast(), retries=2, backoff=0.01) is None
+    assert len(server.prompts) == 3
+
+    server.script = [(400, {})]
+    assert cg._request_sentiment("x", "m", fast()) == "ERROR"
+    assert len(server.prompts) == 4
+
+
+def test_concurrency_is_bounded_by_max_workers(server):
+    server.delay = 0.05
+    cg.getSentiments([f"t{i}" for i in range(12)], "m", max_workers=3, limiter=fast(), cache=None)
+    assert len(server.prompts) == 12
+    assert 1 < server.max_active <= 3
+
+
+def test_token_bucket_limits_request_rate(server):
+    t0 = time.monotonic()
+    cg.getSentiments([f"t{i}" for i in range(6)], "m", max_workers=6,
+                     limiter=cg.TokenBucket(rate=20, capacity=1), cache=None)
+    assert time.monotonic() - t0 >= 5 / 20 - 0.02
+
+
+def test_results_keep_input_order(server):
+    server.reply = _score_reply
+    # later texts answer first
+    server.delay = lambda body: 0.02 * (10 - int(body["messages"][0]["content"].rsplit(" t", 1)[1]))
+    texts = [f"t{i}" for i in range(10)]
+    out = cg.getSentiments(texts, "m", max_workers=10, limiter=fast(), cache=None)
+    assert out == [f"positive, {i % 10 + 1}" for i in range(10)]
+
+
+def test_repeated_prompts_are_requested_once(server):
+    server.reply = _score_reply
+    texts = ["t1", "t2", "t1", "t3", "t2", "t1"]
+    out = cg.getSentiments(texts, "m", limiter=fast(), cache=None)
+    assert len(server.prompts) == 3
+    assert out == ["positive, 2", "positive, 3", "positive, 2", "positive, 4", "positive, 3", "positive, 2"]
+
+
+def test_cache_hit_makes_no_request(server, tmp_path):
+    server.reply = _score_reply
+    cache = SentimentCache(str(tmp_path / "replies.db"))
+    first = cg.getSentiments(["t1", "t2"], "m", limiter=fast(), cache=cache)
+    assert len(server.prompts) == 2
+    again = cg.getSentiments(["t2", "t1"], "m", limiter=fast(), cache=cache)
+    assert len(server.prompts) == 2
+    assert again == first[::-1]
+    cache.close()
+
+
+def test_errors_are_not_cached(server, tmp_path):
+    server.script = [(400, {})]
+    cache = SentimentCache(str(tmp_path / "replies.db"))
+    assert cg.getSentiments(["t1"], "m", limiter=fast(), cache=cache) == ["ERROR"]
+    assert len(cache) == 0
+    server.reply = _score_reply
+    assert cg.getSentiments(["t1"], "m", limiter=fast(), cache=cache) == ["positive, 2"]
+    cache.close()
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ("positive, 7", ("positive", 7)),
+    ("Negative - 2/10", ("negative", 2)),
+    ("Negative, 3 (not positive)", ("negative", 3)),
+    ("neutral rather than negative: 5", ("neutral", 5)),
+    ("no idea", (None, None)),
+])
+def test_parse_sentiment_takes_first_label(reply, expected):
+    assert cg.parse_sentiment(reply) == expected
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from signals.IndicatorState import TickerSignalState, update_ticker_state
+from signals.KlineSignal import calcKD, bollinger_bands
+from signals.RsiSignal import calcRSI
+from signals.MomentumSignal import momentum_signals
+
+SIGNAL_COLS = ["MA_Signal", "Overbought", "Oversold", "Solid_Buy", "Solid_Sell",
+               "KD_Score", "Composite_Score", "Composite_Signal"]
+
+
+def _prices(n, seed):
+    """Random walk with runs of closes at the high / low, so %K == %D ties at 100 and 0."""
+    rng = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    h = c * (1 + np.abs(rng.normal(0, 0.01, n)))
+    l = c * (1 - np.abs(rng.normal(0, 0.01, n)))
+    for s in rng.choice(np.arange(1, n - 8), n // 40, replace=False):
+        up = rng.random() < 0.5
+        for i in range(s, s + int(rng.integers(3, 7))):
+            c[i] = c[i - 1] * (1.01 if up else 0.99)
+            h[i], l[i] = (c[i], c[i] * 0.99) if up else (c[i] * 1.01, c[i])
+    return pd.DataFrame({"Date": pd.bdate_range("2015-01-01", periods=n), "Open": c, "High": h,
+                         "Low": l, "Close": c, "Volume": rng.integers(100000, 1000000, n).astype(float)})
+
+
+def _batch(df):
+    data = df[["Date", "Close", "High", "Low", "Open", "Volume"]].copy()
+    data["chg"] = data["Close"].diff()
+    return momentum_signals(calcRSI(bollinger_bands(calcKD(data).dropna()))).reset_index(drop=True)
+
+
+def _assert_rows_match(ref, got):
+    assert len(ref) == len(got)
+    for c in SIGNAL_COLS:
+        assert (ref[c].astype(str) == got[c].astype(str)).all(), c
+    for c in ["%K", "%D", "middle_band", "upper_band", "lower_band", "RSI"]:
+        np.testing.assert_allclose(got[c].astype(float), ref[c].astype(float), rtol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_replay_matches_batch_pipeline_with_ties(seed):
+    df = _prices(400, seed)
+    state = TickerSignalState()
+    rows = [r for r in (state.update(*t) for t in df[["Date", "Open", "High", "Low", "Close", "Volume"]]
+                        .itertuples(index=False, name=None)) if r is not None]
+    ref = _batch(df)
+    assert ((ref["%K"] == ref["%D"]) & ref["%K"].isin([0, 100])).any()
+    _assert_rows_match(ref, pd.DataFrame(rows).reset_index(drop=True))
+
+
+def test_incremental_update_matches_batch(tmp_path):
+    df = _prices(600, 7)
+    update_ticker_state("X", df.iloc[:500], state_dir=tmp_path)
+    for i in range(500, len(df)):
+        last, _ = update_ticker_state("X", df.iloc[:i + 1], state_dir=tmp_path)
+    ref = _batch(df).iloc[-1]
+    for c in SIGNAL_COLS:
+        assert str(last[c]) == str(ref[c]), c
+    assert last["Date"] == ref["Date"]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.DailyBacktest import backtest_iterrows
+from backtest.VectorBacktest import backtest_vectorized
+
+
+def _frame(open_, signal, solid_buy=None, solid_sell=None):
+    n = len(open_)
+    return pd.DataFrame({
+        'Open': np.asarray(open_, dtype='float64'),
+        'Signal': signal,
+        'Solid_Buy': solid_buy if solid_buy is not None else ['nan'] * n,
+        'Solid_Sell': solid_sell if solid_sell is not None else ['nan'] * n,
+    }, index=pd.bdate_range("2020-01-01", periods=n))
+
+
+def _assert_same(df, initial_cash=10000):
+    ref = backtest_iterrows(df, initial_cash=initial_cash)
+    new = backtest_vectorized(df, initial_cash=initial_cash)
+    assert ref[0].equals(new[0])
+    assert ref[1:] == new[1:]
+    return new
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_iterrows_on_random_signals(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(0, 400))
+    df = _frame(50 * np.exp(np.cumsum(rng.normal(0, 0.02, n))),
+                rng.choice(['Buy', 'Sell', 'nan'], n, p=[0.05, 0.05, 0.9]),
+                rng.choice(['Solid Buy', 'nan'], n, p=[0.02, 0.98]),
+                rng.choice(['Solid Sell', 'nan'], n, p=[0.02, 0.98]))
+    _assert_same(df)
+
+
+def test_no_trades():
+    trades, value, max_dd, ret = _assert_same(_frame([10, 11, 9, 12], ['nan'] * 4))
+    assert trades.empty
+    assert value == 10000 and ret == 0
+
+
+def test_buy_on_first_row():
+    trades, value, _, _ = _assert_same(_frame([10, 11, 9, 12], ['Buy', 'nan', 'nan', 'nan']))
+    assert len(trades) == 1
+    assert value == 12 * 1000
+
+
+def test_sell_without_position():
+    trades, value, max_dd, ret = _assert_same(_frame([10, 11, 9, 12], ['Sell', 'nan', 'Sell', 'nan']))
+    assert trades.empty
+    assert value == 10000 and max_dd == 0 and ret == 0
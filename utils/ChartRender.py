@@ -0,0 +1,213 @@
+import os
+import io
+import time
+import base64
+import atexit
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from utils.corepath import chart_cache_path
+
+# Report chart rendering service.
+#
+# A chart is described by a ChartJob: a module-level plotting function that
+# returns a matplotlib Figure, plus its arguments. Plot functions should build
+# a matplotlib.figure.Figure directly rather than through pyplot, so drawing
+# needs no GUI backend and leaves no global figure state behind. Jobs are plain picklable
+# data, so they can be drawn in worker processes.
+#
+#   jobs --chart_key--> sha256 of (function code, data, style, dpi)
+#        --cache hit--> PNG bytes from memory or `cache_dir`/<key>.png
+#        --miss-------> drawn in a long-lived process pool, written to the cache
+#
+# The key covers the plotting function's bytecode as well as its inputs, so
+# editing a plot function or its data redraws the chart and nothing else does.
+# The pool is started once with POOL_WORKERS processes and every batch is split
+# across it. The first write to a cache directory in a process also deletes
+# PNGs not used for MAX_CACHE_AGE_DAYS (reading a PNG from disk counts as use).
+
+ChartJob = namedtuple("ChartJob", ["func", "args", "kwargs"], defaults=((), {}))
+
+DPI = 160
+POOL_WORKERS = os.cpu_count() or 1
+MAX_CACHE_AGE_DAYS = 30
+
+_memory_cache = {}
+_pool = None
+_pruned_dirs = set()
+
+
+def _digest(h, obj):
+    """Feed a stable byte representation of `obj` into hash `h`."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"DF" + repr((list(obj.columns), list(obj.dtypes.astype(str)))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(b"S" + repr((obj.name, str(obj.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(b"A" + repr((obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"D")
+        for k in sorted(obj, key=repr):
+            _digest(h, k)
+            _digest(h, obj[k])
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"L%d" % len(obj))
+        for v in obj:
+            _digest(h, v)
+    else:
+        h.update(b"O" + repr(obj).encode())
+
+
+def chart_key(job, dpi=DPI):
+    """Cache key of a ChartJob: hash of the plot function's code, its data and style, and the dpi."""
+    code = job.func.__code__
+    h = hashlib.sha256()
+    h.update(f"{job.func.__module__}.{job.func.__qualname__}".encode())
+    h.update(code.co_code)
+    _digest(h, [c for c in code.co_consts if not hasattr(c, "co_code")])
+    _digest(h, job.args)
+    _digest(h, job.kwargs)
+    _digest(h, dpi)
+    return h.hexdigest()
+
+
+def figure_to_png(fig, dpi=DPI):
+    """PNG bytes of a matplotlib Figure (closes it if it is managed by pyplot)."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=dpi)
+    if fig.canvas.manager is not None:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    return buf.getvalue()
+
+
+def png_to_data_uri(png):
+    return "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+
+def _render(job, dpi):
+    return figure_to_png(job.func(*job.args, **job.kwargs), dpi)
+
+
+def _render_chunk(jobs, dpi):
+    return [_render(job, dpi) for job in jobs]
+
+
+def _get_pool():
+    """The render pool (POOL_WORKERS processes), started on first use and kept for later batches."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+    return _pool
+
+
+def shutdown_render_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+
+
+atexit.register(shutdown_render_pool)
+
+
+def _cache_file(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key + ".png")
+
+
+def _read_cached(cache_dir, key):
+    if key in _memory_cache:
+        return _memory_cache[key]
+    if cache_dir:
+        path = _cache_file(cache_dir, key)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                png = f.read()
+            os.utime(path)      # keep charts still in use out of prune_chart_cache
+            _memory_cache[key] = png
+            return png
+    return None
+
+
+def _write_cached(cache_dir, key, png):
+    _memory_cache[key] = png
+    if cache_dir:
+        path = _cache_file(cache_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(png)
+        os.replace(tmp, path)
+
+
+def render_charts(jobs, max_workers=None, cache_dir=chart_cache_path, dpi=DPI):
+    """
+    PNG bytes for every ChartJob in `jobs`, in order.
+
+    Cached charts are returned without drawing. The rest are drawn in the
+    render pool in contiguous chunks (at most one per worker), or in this
+    process when max_workers is 1 or there is only one chart to draw.
+
+    :param max_workers: most pool workers to spread this batch over (default POOL_WORKERS)
+    :param cache_dir: directory for the PNG cache (None: memory only)
+    """
+    jobs = list(jobs)
+    keys = [chart_key(job, dpi) for job in jobs]
+    out = [_read_cached(cache_dir, k) for k in keys]
+
+    todo = {}
+    for i, (k, png) in enumerate(zip(keys, out)):
+        if png is None:
+            todo.setdefault(k, i)      # identical charts are drawn once
+    misses = list(todo.items())
+
+    n_chunks = min(len(misses), max_workers or POOL_WORKERS, POOL_WORKERS)
+    if n_chunks <= 1:
+        drawn = [_render(jobs[i], dpi) for _, i in misses]
+    else:
+        size = -(-len(misses) // n_chunks)
+        chunks = [misses[j:j + size] for j in range(0, len(misses), size)]
+        pool = _get_pool()
+        futures = [pool.submit(_render_chunk, [jobs[i] for _, i in chunk], dpi) for chunk in chunks]
+        drawn = [png for f in futures for png in f.result()]
+
+    for (k, _), png in zip(misses, drawn):
+        _write_cached(cache_dir, k, png)
+    out = [_memory_cache[k] for k in keys]
+    if misses:
+        print(f"[CHART] drew {len(misses)} of {len(jobs)} charts ({len(jobs) - len(misses)} cached)")
+        if cache_dir and cache_dir not in _pruned_dirs:
+            _pruned_dirs.add(cache_dir)
+            removed = prune_chart_cache(cache_dir, MAX_CACHE_AGE_DAYS)
+            if removed:
+                print(f"[CHART] pruned {removed} charts unused for {MAX_CACHE_AGE_DAYS} days")
+    return out
+
+
+def render_data_uris(jobs, **kwargs):
+    """render_charts, as data:image/png;base64 URIs for inline <img> tags."""
+    return [png_to_data_uri(png) for png in render_charts(jobs, **kwargs)]
+
+
+def prune_chart_cache(cache_dir=chart_cache_path, max_age_days=MAX_CACHE_AGE_DAYS):
+    """Delete cached PNGs not written or read for `max_age_days`; returns how many were removed."""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(".png") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                _memory_cache.pop(name[:-len(".png")], None)
+                removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    pass
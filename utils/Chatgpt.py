@@ -1,26 +1,278 @@
 import requests
 import sys
 import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.join(os.getcwd(),".."))
 from utils.credential import *
+from utils.SentimentCache import cache_key, default_sentiment_cache
+from utils.RetryPolicy import MAX_RETRIES, MAX_WORKERS, RETRY_STATUS, retry_delay
 
-def getSentiment(text, model="gpt-5-mini"):
-    # input is a string, outout is also a string
-    prompt = f"Please analyze the sentiment of the following text and return only 'positive', 'neutral', or 'negative', score from  1 (most negative) - 10 (most positive): {text}"
+CHAT_URL = "https://api.openai.com/v1/chat/completions"
+
+# Requests to the chat API go through one token bucket shared by all threads,
+# so a thread pool can score many texts at once without going over the rate
+# limit. 429 and 5xx replies (and dropped connections) are retried with
+# exponential backoff, honouring the server's Retry-After header when sent
+# (see utils.RetryPolicy).
+
+REQUESTS_PER_SECOND = 5
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+chat_limiter = TokenBucket(REQUESTS_PER_SECOND)
+
+
+def post_chat(data, limiter=None, retries=MAX_RETRIES, backoff=1.0, timeout=60):
+    """
+    POST one chat completion request, retrying 429/5xx replies and connection errors.
+    Returns the parsed JSON reply, or None if it still failed after `retries` retries.
+    """
+    limiter = chat_limiter if limiter is None else limiter
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        r = None
+        try:
+            r = requests.post(
+                CHAT_URL,
+                headers={"Authorization": f"Bearer {GPT_Key}", "Content-Type": "application/json"},
+                json=data,
+                # proxies=Proxies,
+                timeout=timeout
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            print(f"[WARN] Chat request failed ({e.__class__.__name__}), attempt {attempt + 1}")
+        else:
+            if r.status_code == 200:
+                return r.json()
+            if r.status_code not in RETRY_STATUS:
+                print(f"[ERR] Chat request returned {r.status_code}")
+                return None
+            print(f"[WARN] Chat request returned {r.status_code}, attempt {attempt + 1}")
+        if attempt < retries:
+            time.sleep(retry_delay(r, attempt, backoff))
+    return None
+
+
+def sentiment_prompt(text):
+    return f"Please analyze the sentiment of the following text and return only 'positive', 'neutral', or 'negative', score from  1 (most negative) - 10 (most positive): {text}"
+
+
+def _resolve_cache(cache):
+    if cache is True:
+        return default_sentiment_cache()
+    return None if cache is None or cache is False else cache
+
+
+def _request_sentiment(prompt, model, limiter=None):
     data = {
         "model": model,
         "messages": [{"role": "user", "content": prompt}]
     }
-    
-    r = requests.post(
-        "https://api.openai.com/v1/chat/completions",
-        headers={"Authorization": f"Bearer {GPT_Key}", "Content-Type": "application/json"},
-        json=data,
-        # proxies=Proxies,
-        timeout=60
-    )
-    
-    if r.status_code == 200:
-        sentiment = r.json()["choices"][0]["message"]["content"].strip()
+
+    reply = post_chat(data, limiter)
+    if reply is not None:
+        sentiment = reply["choices"][0]["message"]["content"].strip()
         return sentiment
-    return "ERROR"
\ No newline at end of file
+    return "ERROR"
+
+
+def getSentiment(text, model="gpt-5-mini", limiter=None, cache=True):
+    # input is a string, outout is also a string
+    # cache: True = shared on-disk SentimentCache, a SentimentCache instance, or None/False
+    return getSentiments([text], model, max_workers=1, limiter=limiter, cache=cache)[0]
+
+
+def getSentiments(texts, model="gpt-5-mini", max_workers=MAX_WORKERS, limiter=None, cache=True):
+    """
+    getSentiment for every text. Replies already in the cache are returned
+    without a request; the rest (each distinct prompt once) run concurrently on
+    a thread pool, rate limited by `limiter` (default the shared chat_limiter).
+    Replies are normalized to 'label, score' (the one format cached under a
+    prompt's key, shared with getSentimentsBatch); a reply that can't be parsed
+    is returned as is and not cached. Results are in the order of `texts`.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    cache = _resolve_cache(cache)
+    prompts = [sentiment_prompt(t) for t in texts]
+    keys = [cache_key(model, p) for p in prompts]
+    done = cache.get_many(keys) if cache is not None else {}
+    done = {k: normalize_sentiment(v) or v for k, v in done.items()}    # entries cached before normalizing
+
+    todo = {}
+    for k, p in zip(keys, prompts):
+        if k not in done:
+            todo.setdefault(k, p)
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as ex:
+            replies = list(ex.map(lambda p: _request_sentiment(p, model, limiter), todo.values()))
+        fresh = {k: normalize_sentiment(v) or v for k, v in zip(todo, replies)}
+        if cache is not None:
+            cache.put_many({k: v for k, v in fresh.items() if normalize_sentiment(v) == v})
+        done.update(fresh)
+    return [done[k] for k in keys]
+
+
+# ---- batched scoring: many texts per request, JSON reply ----
+#
+# Texts are packed into requests up to a rough token budget (~4 characters per
+# token), the model is asked for a JSON object with one {id, sentiment, score}
+# entry per text, and each entry is validated before it is used. Texts whose
+# entry is missing or invalid (or whose whole batch failed) are re-scored one
+# by one through getSentiments. Cached replies are shared with the per-text path.
+
+BATCH_TOKEN_BUDGET = 6000
+BATCH_MAX_ITEMS = 25
+SENTIMENT_LABELS = ("positive", "neutral", "negative")
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def parse_sentiment(reply):
+    """
+    (label, score) from a reply like 'positive, 7' or 'Negative - 2/10'; (None, None) if not found.
+    The label is the first one appearing in the reply ('negative, 3 (not positive)' is negative).
+    """
+    text = str(reply).lower()
+    found = [(text.find(l), l) for l in SENTIMENT_LABELS if l in text]
+    label = min(found)[1] if found else None
+    m = re.search(r"\b(10|[1-9])\b", text)
+    return label, (int(m.group(1)) if m else None)
+
+
+def format_sentiment(label, score):
+    return f"{label}, {score}"
+
+
+def normalize_sentiment(reply):
+    """A reply as 'label, score', or None if it has no label or score."""
+    label, score = parse_sentiment(reply)
+    return None if label is None or score is None else format_sentiment(label, score)
+
+
+def batch_prompt(texts):
+    items = "\n".join(f"[{i}] {t}" for i, t in enumerate(texts))
+    return ("Analyze the sentiment of each numbered text below. Reply with a JSON object "
+            '{"results": [{"id": <number>, "sentiment": "positive" | "neutral" | "negative", '
+            '"score": <integer from 1 (most negative) to 10 (most positive)>}]} '
+            "with exactly one entry per text and nothing else.\n\n" + items)
+
+
+def pack_batches(texts, token_budget=BATCH_TOKEN_BUDGET, max_items=BATCH_MAX_ITEMS):
+    """Split positions 0..len(texts)-1 into consecutive batches within the token budget."""
+    overhead = estimate_tokens(batch_prompt([]))
+    batches, cur, used = [], [], overhead
+    for i, t in enumerate(texts):
+        cost = estimate_tokens(t) + 4
+        if cur and (used + cost > token_budget or len(cur) >= max_items):
+            batches.append(cur)
+            cur, used = [], overhead
+        cur.append(i)
+        used += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def parse_batch_reply(content, n):
+    """{position: 'label, score'} for the valid entries of a batch JSON reply of `n` texts."""
+    try:
+        results = json.loads(content)["results"]
+    except (ValueError, KeyError, TypeError):
+        return {}
+    out = {}
+    for r in results if isinstance(results, list) else []:
+        if not isinstance(r, dict):
+            continue
+        i, label, score = r.get("id"), str(r.get("sentiment", "")).lower(), r.get("score")
+        if isinstance(score, float) and score.is_integer():
+            score = int(score)
+        if (isinstance(i, int) and 0 <= i < n and i not in out and label in SENTIMENT_LABELS
+                and isinstance(score, int) and not isinstance(score, bool) and 1 <= score <= 10):
+            out[i] = format_sentiment(label, score)
+    return out
+
+
+def _request_batch(texts, model, limiter=None):
+    data = {
+        "model": model,
+        "messages": [{"role": "user", "content": batch_prompt(texts)}],
+        "response_format": {"type": "json_object"},
+    }
+    reply = post_chat(data, limiter)
+    if reply is None:
+        return {}
+    return parse_batch_reply(reply["choices"][0]["message"]["content"], len(texts))
+
+
+def getSentimentsBatch(texts, model="gpt-5-mini", token_budget=BATCH_TOKEN_BUDGET,
+                       max_items=BATCH_MAX_ITEMS, max_workers=MAX_WORKERS, limiter=None, cache=True):
+    """
+    Like getSentiments, but many texts per request. Replies are 'label, score'
+    (e.g. 'positive, 7'); texts a batch reply doesn't cover validly fall back
+    to one request each. Results are in the order of `texts`.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    cache = _resolve_cache(cache)
+    keys = [cache_key(model, sentiment_prompt(t)) for t in texts]
+    done = cache.get_many(keys) if cache is not None else {}
+
+    todo = {}
+    for k, t in zip(keys, texts):
+        if k not in done:
+            todo.setdefault(k, t)
+    if todo:
+        todo_keys, todo_texts = list(todo), list(todo.values())
+        batches = pack_batches(todo_texts, token_budget, max_items)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as ex:
+            parsed = list(ex.map(lambda b: _request_batch([todo_texts[i] for i in b], model, limiter),
+                                 batches))
+        fresh = {}
+        for batch, scores in zip(batches, parsed):
+            for j, i in enumerate(batch):
+                if j in scores:
+                    fresh[todo_keys[i]] = scores[j]
+        if cache is not None:
+            cache.put_many(fresh)
+        missing = [i for i in range(len(todo_keys)) if todo_keys[i] not in fresh]
+        print(f"[SENTIMENT] {len(todo)} texts in {len(batches)} batch requests"
+              + (f", {len(missing)} re-scored one by one" if missing else ""))
+        if missing:
+            singles = getSentiments([todo_texts[i] for i in missing], model, max_workers, limiter, cache)
+            fresh.update({todo_keys[i]: s for i, s in zip(missing, singles)})
+        done.update(fresh)
+    return [done[k] for k in keys]
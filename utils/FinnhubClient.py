@@ -0,0 +1,118 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.credential import *
+from utils.RetryPolicy import MAX_RETRIES, MAX_WORKERS, RETRY_STATUS, retry_delay
+
+# One rate-limited wrapper around finnhub.Client for every script.
+#
+# Calls are counted in a sliding window (CALLS_PER_MINUTE per 60 s by default,
+# the free-tier limit); a call only waits when the window is full, and then
+# just until its oldest call ages out. 429 replies (and 5xx) are retried with
+# exponential backoff, using Retry-After when Finnhub sends it (the same
+# utils.RetryPolicy as the chat client). map() runs calls on a thread pool,
+# all going through the same window.
+#
+# Any finnhub.Client method can be called on the wrapper directly:
+#   client = get_finnhub_client()
+#   client.company_news("AAPL", _from=day, to=day)
+
+CALLS_PER_MINUTE = 60
+
+
+class SlidingWindowLimiter:
+    """At most `calls` acquisitions in any `period` seconds (thread-safe)."""
+
+    def __init__(self, calls=CALLS_PER_MINUTE, period=60.0):
+        self.calls = calls
+        self.period = period
+        self.stamps = deque()
+        self.blocked_until = 0.
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.stamps and now - self.stamps[0] >= self.period:
+                    self.stamps.popleft()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif len(self.stamps) < self.calls:
+                    self.stamps.append(now)
+                    return
+                else:
+                    wait = self.period - (now - self.stamps[0])
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every new call for `seconds` (after a 429)."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class FinnhubClient:
+
+    def __init__(self, api_key=None, calls_per_minute=CALLS_PER_MINUTE, max_retries=MAX_RETRIES,
+                 backoff=1.0, client=None):
+        """
+        :param client: an existing finnhub.Client-like object to wrap (default: a new
+                       finnhub.Client with `api_key`, or API_KEY from credentials)
+        """
+        if client is None:
+            import finnhub
+            client = finnhub.Client(api_key=API_KEY if api_key is None else api_key)
+        self.client = client
+        self.limiter = SlidingWindowLimiter(calls_per_minute, 60.0)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def call(self, method, *args, **kwargs):
+        """client.<method>(*args, **kwargs) under the rate limit, retrying 429/5xx."""
+        func = getattr(self.client, method)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status not in RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                wait = retry_delay(getattr(e, "response", None), attempt, self.backoff)
+                print(f"[WARN] Finnhub {method} returned {status}, retrying in {wait:.1f}s")
+                if status == 429:
+                    self.limiter.pause(wait)
+                else:
+                    time.sleep(wait)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(self.client, name, None)):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def map(self, func, items, max_workers=MAX_WORKERS):
+        """
+        [func(item) for item in items] on a thread pool, in order. `func` should
+        make its Finnhub calls through this client so they share the limit.
+        """
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as ex:
+            return list(ex.map(func, items))
+
+
+_shared_client = None
+
+
+def get_finnhub_client():
+    """The process-wide FinnhubClient, created on first use."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = FinnhubClient()
+    return _shared_client
+
+
+if __name__ == "__main__":
+    pass
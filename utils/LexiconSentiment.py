@@ -0,0 +1,166 @@
+import re
+
+import numpy as np
+import pandas as pd
+from utils.Chatgpt import getSentimentsBatch, parse_sentiment, format_sentiment
+
+# Local finance-lexicon sentiment scorer, same 'label, score' (1-10) output as
+# the chat-model scorer and no network.
+#
+# All texts are tokenized in one pass; the tokens are exploded into a single
+# array, looked up in the lexicon and summed per text with a bincount. A word
+# right after a negator ("not", "no", "never", ... within NEGATION_SPAN tokens)
+# counts with the opposite sign.
+#
+#   polarity = sum(weights) / (sum(|weights|) + SMOOTHING)       in (-1, 1)
+#   score    = round(5.5 + 4.5 * polarity), clipped to 1..10
+#
+# scoreSentiments() uses the chat model and falls back to the local score when
+# a reply is an error. mode='hybrid' (opt-in) scores everything locally and
+# sends only the ambiguous texts (no lexicon hits, a near-neutral score or mixed
+# signals) to the remote model.
+
+POSITIVE_WORDS = {
+    2: ["beat", "beats", "surge", "surges", "surged", "soar", "soars", "soared", "record", "upgrade",
+        "upgrades", "upgraded", "outperform", "outperforms", "outperformed", "breakthrough", "rally",
+        "rallies", "rallied", "skyrocket", "skyrockets", "bullish", "blowout", "boom"],
+    1: ["gain", "gains", "gained", "rise", "rises", "rose", "rising", "jump", "jumps", "jumped", "climb",
+        "climbs", "climbed", "up", "higher", "high", "growth", "grow", "grows", "grew", "strong", "stronger",
+        "strength", "profit", "profits", "profitable", "positive", "optimistic", "optimism", "improve",
+        "improves", "improved", "improvement", "expand", "expands", "expansion", "buy", "win", "wins",
+        "won", "success", "successful", "approve", "approves", "approved", "approval", "raise", "raises",
+        "raised", "boost", "boosts", "boosted", "recover", "recovers", "recovered", "recovery", "rebound",
+        "rebounds", "rebounded", "exceed", "exceeds", "exceeded", "robust", "solid", "favorable", "upside",
+        "dividend", "buyback", "partnership", "launch", "launches", "innovation", "innovative", "efficient",
+        "momentum", "accelerate", "accelerates", "accelerating", "opportunity", "opportunities",
+        "confident", "confidence", "tops", "topped", "lead", "leads", "leading"],
+}
+NEGATIVE_WORDS = {
+    2: ["miss", "misses", "missed", "plunge", "plunges", "plunged", "crash", "crashes", "crashed",
+        "downgrade", "downgrades", "downgraded", "bankruptcy", "bankrupt", "fraud", "scandal", "collapse",
+        "collapses", "collapsed", "tumble", "tumbles", "tumbled", "bearish", "default", "defaults",
+        "plummet", "plummets", "plummeted", "recall", "recalls", "investigation", "lawsuit"],
+    1: ["fall", "falls", "fell", "falling", "drop", "drops", "dropped", "decline", "declines", "declined",
+        "down", "lower", "low", "loss", "losses", "lose", "loses", "lost", "weak", "weaker", "weakness",
+        "negative", "pessimistic", "concern", "concerns", "worried", "worry", "worries", "fear", "fears",
+        "risk", "risks", "risky", "cut", "cuts", "layoff", "layoffs", "slump", "slumps", "slumped", "slow",
+        "slows", "slowdown", "slowing", "sell", "selloff", "warn", "warns", "warned", "warning", "probe",
+        "fined", "penalty", "delay", "delays", "delayed", "shortfall", "headwind", "headwinds",
+        "volatile", "volatility", "uncertain", "uncertainty", "downside", "debt", "deficit", "inflation",
+        "recession", "tariff", "tariffs", "sue", "sues", "sued", "halt", "halts", "halted", "struggle",
+        "struggles", "struggling", "disappoint", "disappoints", "disappointed", "disappointing",
+        "underperform", "underperforms", "underperformed", "pressure", "pressures", "sink", "sinks", "sank"],
+}
+NEGATORS = {"not", "no", "never", "without", "neither", "nor", "cannot", "isn't", "wasn't", "aren't",
+            "doesn't", "didn't", "don't", "won't", "hasn't", "haven't", "fails", "failed", "fail"}
+NEGATION_SPAN = 2
+SMOOTHING = 1.0
+NEUTRAL_BAND = (5, 6)       # hybrid mode escalates scores in this range
+MIXED_RATIO = 0.6           # ... and texts whose weaker side is at least this share of the stronger
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+def build_lexicon(positive=POSITIVE_WORDS, negative=NEGATIVE_WORDS):
+    """{word: weight}, positive words > 0, negative words < 0."""
+    lex = {}
+    for weight, words in positive.items():
+        lex.update({w: float(weight) for w in words})
+    for weight, words in negative.items():
+        lex.update({w: -float(weight) for w in words})
+    return lex
+
+
+LEXICON = build_lexicon()
+
+
+def lexicon_scores(texts, lexicon=None):
+    """
+    Lexicon statistics for every text, computed in one vectorized pass.
+
+    :return: DataFrame (one row per text) with pos, neg (summed |weights|),
+             hits (lexicon words found), polarity and score (1-10)
+    """
+    lexicon = LEXICON if lexicon is None else lexicon
+    texts = pd.Series(list(texts), dtype="object").fillna("").astype(str)
+    n = len(texts)
+    tokens = texts.str.lower().str.findall(_TOKEN).explode().dropna()
+    doc = tokens.index.to_numpy(dtype="int64")
+    tok = tokens.to_numpy(dtype="object")
+
+    weight = pd.Series(tok).map(lexicon).fillna(0.).to_numpy()
+    # flip the sign of words within NEGATION_SPAN tokens after a negator in the same text
+    neg = pd.Series(tok).isin(NEGATORS).to_numpy()
+    flip = np.zeros(len(tok), dtype=bool)
+    for k in range(1, NEGATION_SPAN + 1):
+        flip[k:] |= neg[:-k] & (doc[k:] == doc[:-k])
+    weight = np.where(flip, -weight, weight)
+
+    pos = np.bincount(doc, weights=np.clip(weight, 0, None), minlength=n)
+    negw = np.bincount(doc, weights=np.clip(-weight, 0, None), minlength=n)
+    hits = np.bincount(doc, weights=(weight != 0).astype("float64"), minlength=n).astype(int)
+    polarity = (pos - negw) / (pos + negw + SMOOTHING)
+    score = np.clip(np.round(5.5 + 4.5 * polarity), 1, 10).astype(int)
+    return pd.DataFrame({"pos": pos, "neg": negw, "hits": hits, "polarity": polarity, "score": score})
+
+
+def _label(score):
+    return np.where(score >= 7, "positive", np.where(score <= 4, "negative", "neutral"))
+
+
+def _format(scores):
+    return [format_sentiment(l, int(x)) for l, x in zip(_label(scores["score"].to_numpy()), scores["score"])]
+
+
+def lexiconSentiments(texts, lexicon=None):
+    """Local scores for every text, as 'label, score' strings like getSentiment's."""
+    return _format(lexicon_scores(texts, lexicon))
+
+
+def lexiconSentiment(text, lexicon=None):
+    return lexiconSentiments([text], lexicon)[0]
+
+
+def ambiguous(scores):
+    """Boolean mask of texts the lexicon can't call: no hits, near-neutral, or mixed."""
+    lo, hi = NEUTRAL_BAND
+    strong, weak = np.maximum(scores["pos"], scores["neg"]), np.minimum(scores["pos"], scores["neg"])
+    return ((scores["hits"] == 0) | scores["score"].between(lo, hi)
+            | ((weak > 0) & (weak >= MIXED_RATIO * strong))).to_numpy()
+
+
+def scoreSentiments(texts, mode="remote", model="gpt-5-mini", **remote_kwargs):
+    """
+    Sentiment for every text as 'label, score', in order.
+
+    - remote:  chat model (getSentimentsBatch), the default; replies that are
+               'ERROR' or unparseable fall back to the local score.
+    - lexicon: local scorer only.
+    - hybrid:  local scorer first, only ambiguous texts go to the chat model
+               (falling back to the local score if that fails).
+    """
+    texts = list(texts)
+    scores = lexicon_scores(texts)
+    local = _format(scores)
+    if mode == "lexicon" or not texts:
+        return local
+    if mode == "remote":
+        idx = list(range(len(texts)))
+    elif mode == "hybrid":
+        idx = list(np.flatnonzero(ambiguous(scores)))
+    else:
+        raise ValueError(f"unknown mode {mode!r}, expected 'lexicon', 'remote' or 'hybrid'")
+
+    out = list(local)
+    if idx:
+        remote = getSentimentsBatch([texts[i] for i in idx], model, **remote_kwargs)
+        for i, reply in zip(idx, remote):
+            label, score = parse_sentiment(reply)
+            if label is not None and score is not None:
+                out[i] = format_sentiment(label, score)
+        print(f"[SENTIMENT] {len(texts)} texts, {len(idx)} sent to {model}")
+    return out
+
+
+if __name__ == "__main__":
+    pass
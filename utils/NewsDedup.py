@@ -0,0 +1,146 @@
+import re
+import zlib
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import numpy as np
+
+# De-duplication of company news across tickers.
+#
+# Finnhub returns the same story under many tickers (an ETF and its
+# constituents, both sides of a deal), sometimes with a different id or a
+# slightly edited headline. Stories are merged in two passes:
+#
+#   1. exact: same Finnhub id or same normalized URL
+#   2. near:  headline character shingles -> MinHash signatures -> LSH bands;
+#             pairs sharing a band bucket are confirmed with the exact Jaccard
+#             similarity of their shingle sets (>= threshold)
+#
+# Matches are merged with union-find. Every story keeps the list of tickers it
+# was returned for, in first-seen order, so it can be scored and rendered once.
+
+SHINGLE = 4
+NUM_PERM = 64
+BANDS = 16
+JACCARD_THRESHOLD = 0.7
+TRACKING_PARAMS = {"guccounter", "guce_referrer", "guce_referrer_sig", "cmpid", "ref", "src", "fbclid", "gclid"}
+
+_PRIME = (1 << 31) - 1
+
+
+def normalize_url(url):
+    """Scheme-, 'www.'-, fragment- and tracking-parameter-free form of a URL."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = [(k, v) for k, v in parse_qsl(parts.query)
+             if not (k.lower().startswith("utm_") or k.lower() in TRACKING_PARAMS)]
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{urlencode(sorted(query))}" if query else "")
+
+
+def headline_shingles(headline, k=SHINGLE):
+    """Set of character k-grams of the lower-cased, punctuation-free headline."""
+    text = " ".join(re.findall(r"[a-z0-9]+", str(headline).lower()))
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def minhash_signatures(shingle_sets, num_perm=NUM_PERM, seed=0):
+    """(n_docs x num_perm) MinHash signatures; an empty set gets an all-max row."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, num_perm, dtype=np.int64)
+    b = rng.integers(0, _PRIME, num_perm, dtype=np.int64)
+    sig = np.full((len(shingle_sets), num_perm), _PRIME, dtype=np.int64)
+    for d, shingles in enumerate(shingle_sets):
+        if shingles:
+            x = np.fromiter((zlib.crc32(s.encode()) % _PRIME for s in shingles), dtype=np.int64,
+                            count=len(shingles))
+            sig[d] = ((x[:, None] * a[None, :] + b[None, :]) % _PRIME).min(axis=0)
+    return sig
+
+
+def lsh_candidates(sig, bands=BANDS):
+    """Pairs (i, j), i < j, whose signatures agree on every row of at least one band."""
+    n, num_perm = sig.shape
+    rows = num_perm // bands
+    pairs = set()
+    for band in range(bands):
+        buckets = {}
+        for d, key in enumerate(map(bytes, sig[:, band * rows:(band + 1) * rows])):
+            buckets.setdefault(key, []).append(d)
+        for docs in buckets.values():
+            if len(docs) > 1:
+                pairs.update((i, j) for k, i in enumerate(docs) for j in docs[k + 1:])
+    return pairs
+
+
+class _UnionFind:
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)     # the earliest article stays the root
+
+
+def dedup_news(ticker_news, threshold=JACCARD_THRESHOLD):
+    """
+    Merge duplicate articles across tickers.
+
+    :param ticker_news: [(ticker, [Finnhub news dicts])], in display order
+    :param threshold: headline shingle Jaccard similarity for a near-duplicate
+    :return: (stories, ticker_stories)
+             stories: [{'item': first-seen news dict, 'tickers': [tickers it was returned for]}]
+             ticker_stories: [(ticker, [story indices])], same order as ticker_news
+    """
+    flat = [(t, item) for t, items in ticker_news for item in items]
+    uf = _UnionFind(len(flat))
+
+    seen = {}
+    for i, (_, item) in enumerate(flat):
+        for key in (("id", item.get("id")), ("url", normalize_url(item.get("url")))):
+            if key[1]:
+                if key in seen:
+                    uf.union(seen[key], i)
+                else:
+                    seen[key] = i
+
+    shingles = [headline_shingles(item.get("headline", "")) for _, item in flat]
+    if flat:
+        for i, j in lsh_candidates(minhash_signatures(shingles)):
+            si, sj = shingles[i], shingles[j]
+            if si and sj and len(si & sj) >= threshold * len(si | sj):
+                uf.union(i, j)
+
+    story_of_root, stories, ticker_stories = {}, [], []
+    pos = 0
+    for ticker, items in ticker_news:
+        ids = []
+        for _ in items:
+            root = uf.find(pos)
+            if root not in story_of_root:
+                story_of_root[root] = len(stories)
+                stories.append({"item": flat[root][1], "tickers": []})
+            s = story_of_root[root]
+            if s not in ids:
+                ids.append(s)
+                if ticker not in stories[s]["tickers"]:
+                    stories[s]["tickers"].append(ticker)
+            pos += 1
+        ticker_stories.append((ticker, ids))
+    if flat:
+        print(f"[DEDUP] {len(flat)} articles -> {len(stories)} stories")
+    return stories, ticker_stories
+
+
+if __name__ == "__main__":
+    pass
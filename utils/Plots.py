@@ -1,4 +1,8 @@
+import os
+import atexit
+import tempfile
 import plotly.graph_objects as go
+import plotly.io as pio
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -8,14 +12,79 @@ import seaborn as sns
 import base64
 import io
 
+# Static image export goes through kaleido, which drives a headless browser.
+# Starting that browser is the expensive part, so it is started once per run
+# (start_image_export) and every figure after that reuses it. Batches go
+# through plotly.io.write_images, which renders all figures in one call.
+# Older kaleido (< 1.0) keeps its own export process alive after the first
+# figure, so there a batch is a loop over to_image.
+
+_export_started = False
+
+
+def start_image_export(n_tabs=None):
+    """
+    Start the long-lived image export server (kaleido >= 1.0); a no-op when it
+    is already running or kaleido is older. Stopped at exit.
+
+    :param n_tabs: browser tabs rendering concurrently (kaleido default if None)
+    """
+    global _export_started
+    if _export_started:
+        return
+    try:
+        import kaleido
+    except ImportError:
+        return
+    if hasattr(kaleido, 'start_sync_server'):
+        kwargs = {} if n_tabs is None else {'n': n_tabs}
+        kaleido.start_sync_server(silence_warnings=True, **kwargs)
+        atexit.register(stop_image_export)
+    _export_started = True
+
+
+def stop_image_export():
+    global _export_started
+    if not _export_started:
+        return
+    import kaleido
+    if hasattr(kaleido, 'stop_sync_server'):
+        kaleido.stop_sync_server(silence_warnings=True)
+    _export_started = False
+
+
+def plotly_to_images(figs, format='png', width=None, height=None, scale=None):
+    """
+    Export a batch of Plotly figures to image bytes with one export server.
+
+    :param figs: list of plotly Figures
+    :return: list of bytes, in the order of `figs`
+    """
+    figs = list(figs)
+    if not figs:
+        return []
+    start_image_export()
+    if hasattr(pio, 'write_images'):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f'{i}.{format}') for i in range(len(figs))]
+            pio.write_images(figs, paths, format=format, width=width, height=height, scale=scale)
+            out = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    out.append(f.read())
+            return out
+    return [pio.to_image(fig, format=format, width=width, height=height, scale=scale) for fig in figs]
+
+
+def plotly_to_base64_batch(figs, format='png'):
+    """Base64 strings of a batch of Plotly figures (see plotly_to_images)."""
+    return [base64.b64encode(img).decode('utf-8') for img in plotly_to_images(figs, format=format)]
+
+
 def plotly_to_base64(fig):
-    buffer = io.BytesIO()
-    fig.write_image(buffer, format='png')  # Save Plotly figure to buffer
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.read()).decode('utf-8')  # Encode to Base64
-    return img_base64
+    return plotly_to_base64_batch([fig])[0]
 
-def plot_signals(data, ticker, date):
+def plot_signals(data, ticker, date, show=True):
 
     from datetime import timedelta
     
@@ -24,6 +93,8 @@ def plot_signals(data, ticker, date):
     
     :param data: DataFrame with OHLC and signal data
     :param ticker: Ticker symbol for the plot title
+    :param show: display the figure; pass False when exporting many charts
+    :return: the Plotly figure (export a batch with plotly_to_base64_batch)
     """
     fig = go.Figure()
 
@@ -129,11 +200,24 @@ def plot_signals(data, ticker, date):
                       yaxis_title='Price',
                       xaxis_rangeslider_visible=False)
 
-    fig.show()
+    if show:
+        fig.show()
     # Save the figure as an HTML file
     # fig.write_html(f'{ticker} Momentum {endDate}.html')
     # Save the figure as a Base64 string for embedding in an email
 #     buffer = io.BytesIO()
 #     fig.write_image(buffer, format='png')  # Save as PNG to a buffer
 #     buffer.seek(0)
-#     img_base64 = base64.b64encode(buffer.read()).decode('utf-8')  # Convert to Base64
\ No newline at end of file
+#     img_base64 = base64.b64encode(buffer.read()).decode('utf-8')  # Convert to Base64
+
+    return fig
+
+
+def signal_charts_base64(frames, date):
+    """
+    plot_signals for every {ticker: DataFrame} in `frames`, exported in one batch.
+    Returns {ticker: base64 PNG}.
+    """
+    tickers = list(frames)
+    figs = [plot_signals(frames[t], t, date, show=False) for t in tickers]
+    return dict(zip(tickers, plotly_to_base64_batch(figs)))
@@ -0,0 +1,27 @@
+import random
+
+# Retry settings shared by the HTTP clients (utils.Chatgpt, utils.FinnhubClient):
+# which status codes are retried, how often, and how long to wait in between.
+# The wait is the server's Retry-After when it sends one, otherwise exponential
+# backoff with jitter: backoff * 2**attempt * U(0.5, 1.5).
+
+MAX_RETRIES = 5
+MAX_WORKERS = 8
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def retry_delay(response, attempt, backoff):
+    """
+    Seconds to wait before retry `attempt` (0-based).
+
+    :param response: the failed reply (anything with .headers), or None
+    :param backoff: base delay in seconds when there is no Retry-After header
+    """
+    try:
+        return max(float(response.headers.get("Retry-After")), 0.)
+    except (AttributeError, TypeError, ValueError):
+        return backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,110 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from utils.corepath import sentiment_cache_path
+
+# On-disk cache of chat-model replies, one SQLite table:
+#
+#   key (sha256 of model + prompt) | value | created | accessed
+#
+# Entries older than `ttl_days` are ignored and removed; past `max_entries`
+# the least recently read entries are evicted. One connection is shared by
+# all threads behind a lock (the thread-pool scorer in utils.Chatgpt).
+
+TTL_DAYS = 7
+MAX_ENTRIES = 100000
+
+
+def cache_key(model, prompt):
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+
+    def __init__(self, path=sentiment_cache_path, ttl_days=TTL_DAYS, max_entries=MAX_ENTRIES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS replies ("
+                              "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                              "created REAL NOT NULL, accessed REAL NOT NULL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS replies_accessed ON replies (accessed)")
+
+    def get_many(self, keys):
+        """{key: value} for the keys that are cached and not expired."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        with self.lock, self.conn:
+            for i in range(0, len(keys), 500):      # stay under SQLite's variable limit
+                chunk = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM replies WHERE created >= ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})", [now - self.ttl, *chunk])
+                found.update(rows)
+            self.conn.executemany("UPDATE replies SET accessed = ? WHERE key = ?",
+                                  [(now, k) for k in found])
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Store {key: value} (or (key, value) pairs), then evict expired / excess entries."""
+        items = list(items.items()) if isinstance(items, dict) else list(items)
+        if not items:
+            return
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO replies VALUES (?, ?, ?, ?)",
+                                  [(k, v, now, now) for k, v in items])
+            self._evict(now)
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def _evict(self, now):
+        self.conn.execute("DELETE FROM replies WHERE created < ?", (now - self.ttl,))
+        excess = self.conn.execute("SELECT COUNT(*) FROM replies").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.conn.execute("DELETE FROM replies WHERE key IN "
+                              "(SELECT key FROM replies ORDER BY accessed LIMIT ?)", (excess,))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM replies").fetchone()[0]
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM replies")
+
+    def close(self):
+        self.conn.close()
+
+
+_default_cache = None
+
+
+def default_sentiment_cache():
+    """The shared cache at sentiment_cache_path, opened on first use (None if it can't be opened)."""
+    global _default_cache
+    if _default_cache is None:
+        try:
+            _default_cache = SentimentCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"[WARN] Sentiment cache unavailable ({sentiment_cache_path}): {e}")
+            _default_cache = False
+    return _default_cache if _default_cache is not False else None
+
+
+if __name__ == "__main__":
+    pass
@@ -1,7 +1,13 @@
 # __init__.py
 
+from .RetryPolicy import *
 from .Chatgpt import *
+from .SentimentCache import *
+from .LexiconSentiment import *
+from .NewsDedup import *
+from .FinnhubClient import *
 from .Plots import *
+from .ChartRender import *
 from .corepath import *
 from .formats import *
 from .symbols import *
@@ -1,6 +1,12 @@
 
 stock_recommandation_path = '/Desktop/Invest/StockRec'
 data_path = '/Desktop/Invest/stock/data'
+store_path = '/Desktop/Invest/stock/data/store'    # partitioned parquet price store
+panel_cache_path = '/Desktop/Invest/stock/data/panel.bin'    # memory-mapped PricePanel cache
+indicator_state_path = '/Desktop/Invest/stock/data/indicator_state'    # streaming indicator state per ticker
+event_calendar_path = '/Desktop/Invest/stock/data/events'    # event calendars (*.csv) and event-study output
+chart_cache_path = '/Desktop/Invest/stock/data/chart_cache'    # rendered report charts (PNG), keyed by content hash
+sentiment_cache_path = '/Desktop/Invest/stock/data/sentiment_cache.sqlite'    # cached chat-model sentiment replies
 
 if __name__ == "__main__":
     pass